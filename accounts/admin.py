@@ -1,6 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from courses.enrollments import CohortTooLarge, bulk_enroll
+from courses.forms import CohortEnrollmentForm
+from .models import OutboxEmail, User
 
 class UserAdmin(BaseUserAdmin):
     model = User
@@ -15,7 +21,6 @@ class UserAdmin(BaseUserAdmin):
         ("Personal info", {"fields": ("name",)}),
         ("Permissions", {"fields": ("is_admin", "is_student", "is_active", "is_staff", "is_superuser")}),
         ("Important dates", {"fields": ("last_login", "date_joined")}),
-        ("OTP", {"fields": ("otp",)}),
     )
 
     add_fieldsets = (
@@ -24,5 +29,48 @@ class UserAdmin(BaseUserAdmin):
             "fields": ("email", "name", "password1", "password2", "is_student", "is_admin", "is_active"),
         }),
     )
+    actions = ["enroll_in_courses"]
+
+    @admin.action(description="Enroll selected students in courses")
+    def enroll_in_courses(self, request, queryset):
+        """Pick courses on an intermediate page, then enroll the whole selection at once."""
+        form = CohortEnrollmentForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            students = queryset.filter(is_student=True).values_list("id", flat=True)
+            try:
+                result = bulk_enroll(students, [course.pk for course in form.cleaned_data["courses"]])
+            except CohortTooLarge as exc:
+                self.message_user(request, f"{exc} Select fewer students or courses.", messages.ERROR)
+                return None
+            self.message_user(request, f"{result['created']} enrollment(s) created, "
+                                       f"{result['skipped']} already existed.")
+            return None
+        return TemplateResponse(request, "admin/accounts/user/enroll_in_courses.html", {
+            **self.admin_site.each_context(request),
+            "title": "Enroll students in courses",
+            "opts": self.model._meta,
+            "form": form,
+            "count": queryset.filter(is_student=True).count(),
+            # resubmitted so the action runs again on the same selection
+            "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across", "0"),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        })
 
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected messages")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=OutboxEmail.SENT).update(
+            status=OutboxEmail.PENDING, attempts=0, next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{count} message(s) requeued.")
@@ -0,0 +1,64 @@
+# accounts/async_views.py
+"""
+Native async versions of the read-heavy accounts pages, routed instead of
+the classes in accounts.views when settings.ASYNC_VIEWS is on (off by
+default: `manage.py bench_concurrency` measured them slower than the sync
+views even under ASGI). Everything a template shows is fetched with the async ORM
+before rendering, since a lazy query during rendering would fail in an
+async context.
+"""
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import render
+from django.views import View
+
+from courses.favorites import aget_favorite_ids
+from courses.models import Course
+from .models import StatCounter
+
+
+class AsyncUserMixin:
+    """Resolve request.user with the async auth API before the handler runs."""
+    login_required = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if self.login_required and not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class LandingView(AsyncUserMixin, View):
+    template_name = "accounts/landing.html"
+
+    async def get(self, request):
+        featured = [course async for course in Course.objects.order_by("-created_at")[:6]]
+        return render(request, self.template_name, {
+            "featured": featured,
+            "favorite_ids": await aget_favorite_ids(request.user),
+        })
+
+
+class DashboardView(AsyncUserMixin, View):
+    template_name = "accounts/dashboard.html"
+    login_required = True
+
+    async def get(self, request):
+        stats = {}
+        recent_courses = [course async for course in Course.objects.order_by("-created_at")[:6]]
+        counters = await StatCounter.asnapshot()
+
+        if request.user.is_admin:
+            stats["students_count"] = counters.get(StatCounter.STUDENTS, 0)
+            stats["courses_count"] = counters.get(StatCounter.COURSES, 0)
+            stats["favorites_count"] = counters.get(StatCounter.FAVORITES, 0)
+            favorite_ids = set()
+        else:
+            favorite_ids = await aget_favorite_ids(request.user)
+            stats["my_favorites_count"] = len(favorite_ids)
+            stats["courses_count"] = counters.get(StatCounter.COURSES, 0)
+
+        return render(request, self.template_name, {
+            "stats": stats,
+            "recent_courses": recent_courses,
+            "favorite_ids": favorite_ids,
+        })
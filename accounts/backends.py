@@ -0,0 +1,31 @@
+# accounts/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+User = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the session user together with its StudentProfile
+    in one query. request.user is resolved once per request, so the navbar
+    avatar/name and views reading request.user.studentprofile add no queries;
+    users without a profile get the "missing" answer cached as well.
+    """
+
+    def _users(self):
+        return User._default_manager.select_related("studentprofile")
+
+    def get_user(self, user_id):
+        try:
+            user = self._users().get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await self._users().aget(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
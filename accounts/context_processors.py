@@ -2,17 +2,22 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from courses.images import has_variants, srcset, variant_url
+
 User = get_user_model()
 
 def current_profile(request):
     """
     Add current_profile and safe display fields to every template's context.
     Avoids repeated lookups and prevents template VariableDoesNotExist issues.
+    The profile arrives with request.user (see accounts.backends), so this
+    adds no queries.
     """
     user = getattr(request, "user", None)
     profile = None
     display_name = None
     avatar_url = None
+    avatar_srcset = None
     email = None
 
     if user and user.is_authenticated:
@@ -31,7 +36,11 @@ def current_profile(request):
 
         if profile and getattr(profile, "avatar", None):
             try:
-                avatar_url = profile.avatar.url
+                # navbar/profile avatars are at most ~110px, serve a resized copy
+                avatar_url = variant_url(profile.avatar, profile.avatar_variants, 96)
+                if has_variants(profile.avatar, profile.avatar_variants):
+                    avatar_srcset = srcset(profile.avatar, profile.avatar_variants,
+                                           profile.avatar_variants["fallback"])
             except Exception:
                 avatar_url = None
 
@@ -40,4 +49,5 @@ def current_profile(request):
         "current_user_display_name": display_name,
         "current_user_email": email,
         "current_user_avatar_url": avatar_url,
+        "current_user_avatar_srcset": avatar_srcset,
     }
@@ -37,6 +37,16 @@ class AvatarForm(forms.ModelForm):
         fields = ["avatar"]
 
 
+class UserFilterForm(forms.Form):
+    """Search and filters for the Manage Users page."""
+    q = forms.CharField(required=False, max_length=254,
+                        widget=forms.TextInput(attrs={"class": "form-control form-control-sm", "placeholder": "Email or name starts with"}))
+    role = forms.ChoiceField(required=False, choices=[("", "Any role"), ("student", "Students"), ("staff", "Non-students")],
+                             widget=forms.Select(attrs={"class": "form-select form-select-sm"}))
+    status = forms.ChoiceField(required=False, choices=[("", "Any status"), ("active", "Active"), ("inactive", "Inactive")],
+                               widget=forms.Select(attrs={"class": "form-select form-select-sm"}))
+
+
 class PasswordResetRequestForm(forms.Form):
     email = forms.EmailField(widget=forms.EmailInput(attrs={"class": "form-control"}))
 
@@ -0,0 +1,116 @@
+# accounts/hashers.py
+"""
+Password hashers whose work factor comes from settings.
+
+settings.PASSWORD_HASHER picks the hasher new passwords are encoded with
+and settings.PASSWORD_HASH_COST its work factor (0 keeps Django's default);
+`manage.py calibrate_hasher` measures what a cost means on this host. The
+other hashers stay listed so older passwords still verify. Changing either
+setting needs no migration: check_password() re-encodes a password stored
+with another hasher or cost (must_update()) when its owner next logs in.
+
+Each subclass keeps its parent's algorithm name, so existing hashes are
+still recognised.
+"""
+import math
+import statistics
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from core.benchmarking import time_calls
+
+
+def configured_cost(hasher, default):
+    """settings.PASSWORD_HASH_COST when `hasher` is the preferred one, else `default`."""
+    if settings.PASSWORD_HASH_COST and settings.PASSWORD_HASHER == hasher.algorithm:
+        return settings.PASSWORD_HASH_COST
+    return default
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return configured_cost(self, super().iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        # N; must be a power of two
+        return configured_cost(self, super().work_factor)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return configured_cost(self, super().time_cost)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        # log2 of the iterations
+        return configured_cost(self, super().rounds)
+
+
+# algorithm: (hasher, cost attribute, lowest cost ever recommended, whether a
+# cost step doubles the work). The floors follow OWASP's password storage
+# guidance (scrypt, argon2 and bcrypt at Django's defaults for the other
+# parameters).
+TUNABLE = {
+    "pbkdf2_sha256": (PBKDF2PasswordHasher, "iterations", 600_000, False),
+    "scrypt": (ScryptPasswordHasher, "work_factor", 2 ** 14, True),
+    "argon2": (Argon2PasswordHasher, "time_cost", 1, False),
+    "bcrypt_sha256": (BCryptSHA256PasswordHasher, "rounds", 10, True),
+}
+CALIBRATION_PASSWORD = "calibration-Pa55word"
+
+
+def available(algorithm):
+    """Whether the library behind `algorithm` is installed."""
+    hasher = TUNABLE[algorithm][0]()
+    try:
+        hasher.library and hasher._load_library()
+    except ValueError:
+        return False
+    return True
+
+
+def current_cost(algorithm):
+    hasher, attribute, _, _ = TUNABLE[algorithm]
+    return getattr(hasher(), attribute)
+
+
+def hasher_at(algorithm, cost):
+    """A hasher for `algorithm` fixed at `cost`, whatever the settings say."""
+    hasher_class, attribute, _, _ = TUNABLE[algorithm]
+    hasher = hasher_class.__base__()  # Django's own class, whose cost is a plain attribute
+    setattr(hasher, attribute, cost)
+    return hasher
+
+
+def hash_ms(algorithm, cost, samples=3):
+    """Median milliseconds to encode one password with `algorithm` at `cost`."""
+    hasher = hasher_at(algorithm, cost)
+    salt = hasher.salt()
+    return statistics.median(time_calls(lambda: hasher.encode(CALIBRATION_PASSWORD, salt), samples)) * 1000
+
+
+def calibrate(algorithm, target_ms, samples=3):
+    """
+    The highest cost of `algorithm` that encodes within `target_ms` on this
+    host (never below its floor), from one probe at Django's default cost
+    scaled linearly or by doublings. Returns (cost, measured ms).
+    """
+    hasher_class, attribute, floor, doubles = TUNABLE[algorithm]
+    probe = getattr(hasher_class.__base__, attribute)
+    ratio = target_ms / hash_ms(algorithm, probe, samples)
+    if not doubles:
+        cost = int(float(f"{probe * ratio:.2g}"))  # two significant digits
+    elif attribute == "rounds":
+        cost = probe + math.floor(math.log2(ratio))
+    else:
+        cost = int(probe * 2 ** math.floor(math.log2(ratio)))
+    cost = max(cost, floor)
+    return cost, hash_ms(algorithm, cost, samples)
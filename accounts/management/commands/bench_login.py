@@ -0,0 +1,69 @@
+# accounts/management/commands/bench_login.py
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from accounts.hashers import TUNABLE, current_cost, hasher_at
+from core.benchmarking import bench_client, rolled_back, summarize
+
+User = get_user_model()
+PASSWORD = "bench-Login-pass-123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput through the login view with the configured "
+        "password hasher (PASSWORD_HASHER / PASSWORD_HASH_COST), including the "
+        "first login of users whose hash was stored at another cost and is "
+        "re-encoded on the way. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--logins", type=int, default=20, help="Logins by users with current hashes.")
+
+    def handle(self, *args, **options):
+        algorithm = settings.PASSWORD_HASHER
+        _, attribute, _, _ = TUNABLE[algorithm]
+        cost = current_cost(algorithm)
+        stale = hasher_at(algorithm, cost - 1 if attribute == "rounds" else max(1, cost // 2))
+        count = max(1, options["users"])
+
+        with rolled_back():
+            current = [User.objects.create_user(f"bench-login-{i}@example.com", "Bench", PASSWORD)
+                       for i in range(count)]
+            outdated = [User.objects.create(email=f"bench-stale-{i}@example.com", name="Bench",
+                                            password=make_password(PASSWORD, hasher=stale))
+                        for i in range(count)]
+
+            first = self.measure(outdated)
+            rehashed = sum(not get_hasher().must_update(user.password)
+                           for user in User.objects.filter(pk__in=[u.pk for u in outdated]))
+            steady = self.measure([current[i % count] for i in range(max(1, options["logins"]))])
+
+        self.stdout.write(f"{algorithm} at {attribute}={cost}; stale hashes at {getattr(stale, attribute)}")
+        self.stdout.write(f"{'path':<24} {'logins':>7} {'logins/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for label, (elapsed, samples) in (("login", steady), ("first login, rehash", first)):
+            stats = summarize(samples)
+            self.stdout.write(
+                f"{label:<24} {len(samples):>7} {len(samples) / elapsed:>9.2f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            )
+        self.stdout.write(f"{rehashed}/{count} stale hashes were re-encoded at login.")
+
+    def measure(self, users):
+        url = reverse("accounts:login")
+        samples = []
+        started = time.perf_counter()
+        for user in users:
+            with bench_client() as client:
+                begin = time.perf_counter()
+                response = client.post(url, {"username": user.email, "password": PASSWORD})
+                samples.append(time.perf_counter() - begin)
+            if response.status_code != 302:
+                raise CommandError(f"login as {user.email} returned {response.status_code}")
+        return time.perf_counter() - started, samples
@@ -0,0 +1,99 @@
+# accounts/management/commands/bench_sessions.py
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.benchmarking import bench_client, rolled_back, summarize
+from courses.models import Course
+
+User = get_user_model()
+
+
+def _split(value, choices, option):
+    names = [name for name in value.split(",") if name]
+    unknown = set(names) - set(choices)
+    if unknown:
+        raise CommandError(f"Unknown {option}: {', '.join(sorted(unknown))} (choose from {', '.join(choices)})")
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        "Count database round-trips per request on the browse and toggle paths "
+        "for each session engine / message storage pair in settings.SESSION_ENGINES "
+        "and settings.MESSAGE_STORAGES. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Iterations per path and mode.")
+        parser.add_argument("--sessions", default="db,cached_db,signed_cookies")
+        parser.add_argument("--messages", default="session,fallback")
+
+    def handle(self, *args, **options):
+        sessions = _split(options["sessions"], settings.SESSION_ENGINES, "session store")
+        storages = _split(options["messages"], settings.MESSAGE_STORAGES, "message store")
+        repeat = options["requests"]
+
+        rows = []
+        with rolled_back():
+            user = User.objects.create_user("bench-sessions@example.com", "Bench", "bench-pass-123")
+            course = Course.objects.create(title="Session bench", description="Lorem ipsum " * 40)
+            list_url = reverse("courses:course_list")
+            detail_url = reverse("courses:course_detail", args=[course.pk])
+            toggle_url = reverse("courses:toggle_favorite", args=[course.pk])
+
+            def check(response, status):
+                if response.status_code != status:
+                    raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}")
+
+            def browse(client):
+                check(client.get(list_url), 200)
+                check(client.get(detail_url), 200)
+                return 2
+
+            def toggle(client):
+                # the POST queues a flash message that the redirect target shows
+                check(client.post(toggle_url, HTTP_REFERER=detail_url), 302)
+                check(client.get(detail_url), 200)
+                return 2
+
+            for session in sessions:
+                for storage in storages:
+                    engines = {
+                        "SESSION_ENGINE": settings.SESSION_ENGINES[session],
+                        "MESSAGE_STORAGE": settings.MESSAGE_STORAGES[storage],
+                    }
+                    cache.clear()
+                    with override_settings(**engines), bench_client(user) as client:
+                        for name, path in (("browse", browse), ("toggle", toggle)):
+                            path(client)  # warm caches and the session
+                            rows.append((name, session, storage, *self.measure(client, path, repeat)))
+            cache.clear()
+
+        self.stdout.write(f"{repeat} iterations per path; figures are per request")
+        self.stdout.write(
+            f"{'path':<7} {'session':<15} {'messages':<9} {'queries':>8} {'session q':>10} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for name, session, storage, queries, session_queries, stats in sorted(rows, key=lambda row: row[0]):
+            self.stdout.write(
+                f"{name:<7} {session:<15} {storage:<9} {queries:>8.2f} {session_queries:>10.2f} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}"
+            )
+
+    def measure(self, client, path, repeat):
+        samples, requests = [], 0
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                count = path(client)
+                elapsed = time.perf_counter() - started
+                samples.extend([elapsed / count] * count)
+                requests += count
+        session_queries = sum("django_session" in q["sql"] for q in ctx.captured_queries)
+        return len(ctx.captured_queries) / requests, session_queries / requests, summarize(samples)
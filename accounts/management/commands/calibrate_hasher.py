@@ -0,0 +1,68 @@
+# accounts/management/commands/calibrate_hasher.py
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import TUNABLE, available, calibrate, current_cost, hash_ms
+
+
+def write_env(path, values):
+    """Set KEY=value lines in an env file, keeping every other line."""
+    lines = path.read_text().splitlines() if path.exists() else []
+    lines = [line for line in lines if line.partition("=")[0].strip() not in values]
+    lines += [f"{key}={value}" for key, value in values.items()]
+    path.write_text("\n".join(lines) + "\n")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time each available password hasher on this host and recommend the work "
+        "factor that keeps one hash within --target-ms. With --write, store the "
+        "choice as PASSWORD_HASHER / PASSWORD_HASH_COST in an env file; existing "
+        "passwords are re-encoded as their owners log in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250.0,
+                            help="Time budget for one hash (= one login) on one core.")
+        parser.add_argument("--samples", type=int, default=3)
+        parser.add_argument("--hashers", default=",".join(TUNABLE))
+        parser.add_argument("--use", default=settings.PASSWORD_HASHER,
+                            help="Hasher whose recommendation --write stores.")
+        parser.add_argument("--write", metavar="ENV_FILE", help="Env file to update.")
+
+    def handle(self, *args, **options):
+        names = [name for name in options["hashers"].split(",") if name]
+        unknown = set(names + [options["use"]]) - set(TUNABLE)
+        if unknown:
+            raise CommandError(f"Unknown hasher: {', '.join(sorted(unknown))} (choose from {', '.join(TUNABLE)})")
+
+        samples = max(1, options["samples"])
+        self.stdout.write(f"target {options['target_ms']:.0f} ms per hash")
+        self.stdout.write(
+            f"{'hasher':<15} {'current':>10} {'ms':>8} {'recommended':>12} {'ms':>8} {'logins/s/core':>14}"
+        )
+        recommended = {}
+        for name in names:
+            if not available(name):
+                self.stdout.write(f"{name:<15} (library not installed)")
+                continue
+            cost = current_cost(name)
+            current_ms = hash_ms(name, cost, samples)
+            recommended[name], ms = calibrate(name, options["target_ms"], samples)
+            self.stdout.write(
+                f"{name:<15} {cost:>10} {current_ms:>8.1f} {recommended[name]:>12} {ms:>8.1f} {1000 / ms:>14.1f}"
+            )
+            if ms > options["target_ms"]:
+                self.stdout.write(f"  {name}: the lowest recommended cost already exceeds the target here")
+
+        if options["write"]:
+            if options["use"] not in recommended:
+                raise CommandError(f"{options['use']} was not calibrated; add it to --hashers.")
+            values = {"PASSWORD_HASHER": options["use"], "PASSWORD_HASH_COST": recommended[options["use"]]}
+            write_env(Path(options["write"]), values)
+            self.stdout.write(
+                f"Wrote {', '.join(f'{k}={v}' for k, v in values.items())} to {options['write']}; "
+                "passwords are re-encoded at their next login."
+            )
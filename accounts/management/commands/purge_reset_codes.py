@@ -0,0 +1,15 @@
+# accounts/management/commands/purge_reset_codes.py
+from django.core.management.base import BaseCommand
+
+from accounts.otp import purge_expired_codes
+
+
+class Command(BaseCommand):
+    help = "Delete expired password reset codes in batches; run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_codes(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(f"Deleted {deleted} expired reset code(s).")
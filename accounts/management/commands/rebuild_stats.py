@@ -0,0 +1,31 @@
+# accounts/management/commands/rebuild_stats.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import StatCounter
+from courses.models import Course, Enrollment, Favorite
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard StatCounter rows from the source tables."
+
+    def handle(self, *args, **options):
+        actual = {
+            StatCounter.STUDENTS: User.objects.filter(is_student=True).count(),
+            StatCounter.COURSES: Course.objects.count(),
+            StatCounter.FAVORITES: Favorite.objects.count(),
+            StatCounter.ENROLLMENTS: Enrollment.objects.count(),
+        }
+
+        with transaction.atomic():
+            stored = dict(StatCounter.objects.select_for_update().values_list("key", "value"))
+            for key, value in actual.items():
+                StatCounter.objects.update_or_create(key=key, defaults={"value": value})
+                drift = value - stored.get(key, 0)
+                note = f" (drift {drift:+d})" if drift else ""
+                self.stdout.write(f"{key}: {value}{note}")
+
+        self.stdout.write(self.style.SUCCESS("Stats rebuilt."))
@@ -0,0 +1,40 @@
+# accounts/management/commands/send_outbox.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import drain_outbox, outbox_metrics
+
+
+class Command(BaseCommand):
+    help = "Send queued OutboxEmail rows in batches over one mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new mail instead of exiting when the queue is empty.")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds to sleep between polls with --loop (default 5).")
+        parser.add_argument("--stats", action="store_true",
+                            help="Print queue metrics and exit without sending.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for key, value in outbox_metrics().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        while True:
+            started = time.perf_counter()
+            totals = drain_outbox(batch_size=max(1, options["batch_size"]))
+            elapsed = time.perf_counter() - started
+            if totals["sent"] or totals["failed"] or not options["loop"]:
+                rate = totals["sent"] / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"Sent {totals['sent']}, failed {totals['failed']} in {totals['batches']} batches "
+                    f"({elapsed:.2f}s, {rate:,.0f} msgs/sec)."
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    StudentProfile = apps.get_model("accounts", "StudentProfile")
+    Course = apps.get_model("courses", "Course")
+    Enrollment = apps.get_model("courses", "Enrollment")
+    StatCounter = apps.get_model("accounts", "StatCounter")
+
+    counts = {
+        "students": User.objects.filter(is_student=True).count(),
+        "courses": Course.objects.count(),
+        "favorites": StudentProfile.favorite_courses.through.objects.count(),
+        "enrollments": Enrollment.objects.count(),
+    }
+    StatCounter.objects.bulk_create(StatCounter(key=k, value=v) for k, v in counts.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_studentprofile_avatar_user_otp_created_at'),
+        ('courses', '0004_course_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_outboxemail'),
+        # the links are copied into courses.Favorite first
+        ('courses', '0009_copy_profile_favorites'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='studentprofile',
+            name='favorite_courses',
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+OLD_BACKEND = "django.contrib.auth.backends.ModelBackend"
+NEW_BACKEND = "accounts.backends.ProfileBackend"
+
+
+def move_sessions(apps, schema_editor):
+    """
+    Point database sessions logged in through ModelBackend at ProfileBackend,
+    now the only backend listed. Sessions kept in the cache or in signed
+    cookies cannot be reached from here; their users log in again once.
+    """
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model("sessions", "Session")
+    store = SessionStore()
+    for session in Session.objects.filter(session_data__isnull=False).iterator(chunk_size=2000):
+        data = store.decode(session.session_data)
+        if data.get("_auth_user_backend") == OLD_BACKEND:
+            data["_auth_user_backend"] = NEW_BACKEND
+            Session.objects.filter(pk=session.pk).update(session_data=store.encode(data))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_password_reset_codes'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_sessions, migrations.RunPython.noop),
+    ]
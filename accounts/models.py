@@ -1,6 +1,8 @@
 # accounts/models.py
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.conf import settings
 
@@ -29,32 +31,182 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_student = models.BooleanField(default=True)
     date_joined = models.DateTimeField(default=timezone.now)
 
-    # OTP fields
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_created_at = models.DateTimeField(blank=True, null=True)
-
     objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["name"]
 
+    class Meta:
+        indexes = [
+            # keyset pagination on the Manage Users page, with and without filters
+            models.Index(fields=["-date_joined", "-id"], name="user_joined_id_idx"),
+            models.Index(fields=["is_student", "-date_joined", "-id"], name="user_student_joined_idx"),
+            models.Index(fields=["is_active", "-date_joined", "-id"], name="user_active_joined_idx"),
+            # case-insensitive prefix search, queried as a range on lower(...)
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+            models.Index(Lower("name"), name="user_name_lower_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
 class StudentProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    favorite_courses = models.ManyToManyField("courses.Course", blank=True, related_name="favorited_by_students")
     grade = models.FloatField(null=True, blank=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    # manifest of resized copies written by courses.images
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.user.email
 
+class StatCounter(models.Model):
+    """
+    Denormalized site-wide counters shown on the admin dashboard.
+    Kept current by the signal receivers below; `manage.py rebuild_stats`
+    recomputes them from the source tables if they ever drift.
+    """
+    STUDENTS = "students"
+    COURSES = "courses"
+    FAVORITES = "favorites"
+    ENROLLMENTS = "enrollments"
+
+    key = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+    @classmethod
+    def bump(cls, key, delta=1):
+        if not delta:
+            return
+        if not cls.objects.filter(key=key).update(value=F("value") + delta):
+            _, created = cls.objects.get_or_create(key=key, defaults={"value": delta})
+            if not created:
+                cls.objects.filter(key=key).update(value=F("value") + delta)
+
+    @classmethod
+    def snapshot(cls):
+        """All counters as a dict, in a single query."""
+        return dict(cls.objects.values_list("key", "value"))
+
+    @classmethod
+    async def asnapshot(cls):
+        return {key: value async for key, value in cls.objects.values_list("key", "value")}
+
+class OutboxEmail(models.Model):
+    """
+    Mail waiting to be sent by `manage.py send_outbox`. Views queue mail here
+    (see accounts.outbox) instead of talking to SMTP inside the request.
+    """
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (DEAD, "Dead")]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # due time while pending; pushed forward while a worker holds the row
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+class PasswordResetCode(models.Model):
+    """
+    The outstanding password reset OTP of a user, kept off the User row that
+    every authenticated request reads (see accounts.otp). Only an HMAC of
+    the code is stored; `manage.py purge_reset_codes` deletes expired rows.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name="+")
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at"], name="reset_code_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"reset code for user {self.user_id}, expires {self.expires_at:%Y-%m-%d %H:%M}"
+
 # Signals: create StudentProfile on user creation if student
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
+from courses.models import Course, Enrollment, Favorite
 
 @receiver(post_save, sender=User)
 def create_student_profile(sender, instance, created, **kwargs):
     if created and instance.is_student:
         StudentProfile.objects.create(user=instance)
+
+# Signals: keep StatCounter in step with the source tables
+@receiver(post_init, sender=User)
+def remember_student_flag(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._stats_is_student = False
+    elif "is_student" in instance.get_deferred_fields():
+        instance._stats_is_student = None
+    else:
+        instance._stats_is_student = instance.is_student
+
+@receiver(post_save, sender=User)
+def count_students_on_save(sender, instance, created, **kwargs):
+    was_student = instance._stats_is_student
+    if was_student is None:
+        return
+    if instance.is_student != was_student:
+        StatCounter.bump(StatCounter.STUDENTS, 1 if instance.is_student else -1)
+    instance._stats_is_student = instance.is_student
+
+@receiver(pre_delete, sender=User)
+def count_user_favorites_on_delete(sender, instance, **kwargs):
+    # favorites are cascade-deleted without signals, count them here
+    StatCounter.bump(StatCounter.FAVORITES, -Favorite.objects.filter(user_id=instance.pk).count())
+
+@receiver(post_delete, sender=User)
+def count_students_on_delete(sender, instance, **kwargs):
+    if instance.is_student:
+        StatCounter.bump(StatCounter.STUDENTS, -1)
+
+@receiver(post_save, sender=Course)
+def count_courses_on_save(sender, instance, created, **kwargs):
+    if created:
+        StatCounter.bump(StatCounter.COURSES)
+
+@receiver(pre_delete, sender=Course)
+def count_courses_on_delete(sender, instance, **kwargs):
+    # favorites are cascade-deleted without signals, count them here
+    StatCounter.bump(StatCounter.FAVORITES, -Favorite.objects.filter(course_id=instance.pk).count())
+    StatCounter.bump(StatCounter.COURSES, -1)
+
+# Favorite has no delete receivers on purpose: they would stop Django from
+# cascading with a single DELETE. courses.favorites.delete_favorites() and
+# the receivers above account for removals instead.
+@receiver(post_save, sender=Favorite)
+def count_favorites_on_save(sender, instance, created, **kwargs):
+    if created:
+        StatCounter.bump(StatCounter.FAVORITES)
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollments_on_save(sender, instance, created, **kwargs):
+    if created:
+        StatCounter.bump(StatCounter.ENROLLMENTS)
+
+@receiver(post_delete, sender=Enrollment)
+def count_enrollments_on_delete(sender, instance, **kwargs):
+    StatCounter.bump(StatCounter.ENROLLMENTS, -1)
@@ -0,0 +1,65 @@
+# accounts/otp.py
+"""
+Password reset codes.
+
+issue_code() upserts one PasswordResetCode row per user and returns the
+plain code for the email; only an HMAC of it (keyed with SECRET_KEY and
+bound to the user) is stored, so a leaked table does not hand out resets.
+consume_code() verifies and spends a code with a single DELETE on the
+primary key. Expired rows are left for purge_expired_codes(), which
+`manage.py purge_reset_codes` runs in batches over the expiry index.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import PasswordResetCode
+
+CODE_DIGITS = 6
+# consume_code() outcomes
+VALID, EXPIRED, INVALID = "valid", "expired", "invalid"
+
+
+def hash_code(user_id, code):
+    return salted_hmac("accounts.otp.PasswordResetCode", f"{user_id}:{code}", algorithm="sha256").hexdigest()
+
+
+def issue_code(user):
+    """Create (or replace) `user`'s reset code and return it in plain text."""
+    code = f"{secrets.randbelow(10 ** CODE_DIGITS):0{CODE_DIGITS}d}"
+    PasswordResetCode.objects.bulk_create(
+        [PasswordResetCode(user_id=user.pk, code_hash=hash_code(user.pk, code),
+                           expires_at=timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS))],
+        update_conflicts=True, unique_fields=["user"], update_fields=["code_hash", "expires_at"],
+    )
+    return code
+
+
+def consume_code(user_id, code):
+    """
+    Spend `user_id`'s code if `code` matches and has not expired. Returns
+    VALID, EXPIRED or INVALID; only a failed attempt costs a second query.
+    """
+    code_hash = hash_code(user_id, code)
+    deleted, _ = PasswordResetCode.objects.filter(
+        pk=user_id, code_hash=code_hash, expires_at__gt=timezone.now(),
+    ).delete()
+    if deleted:
+        return VALID
+    return EXPIRED if PasswordResetCode.objects.filter(pk=user_id, code_hash=code_hash).exists() else INVALID
+
+
+def purge_expired_codes(batch_size=1000, now=None):
+    """Delete expired codes `batch_size` rows at a time; returns how many."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(PasswordResetCode.objects.filter(expires_at__lte=now)
+                   .order_by("expires_at").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return total
+        deleted, _ = PasswordResetCode.objects.filter(pk__in=ids).delete()
+        total += deleted
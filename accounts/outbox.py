@@ -0,0 +1,131 @@
+# accounts/outbox.py
+"""
+Transactional email outbox.
+
+`queue_mail()` stores a message in OutboxEmail; `manage.py send_outbox`
+calls `drain_outbox()`, which claims due rows in batches and sends them over
+a single reused backend connection. Failed messages are retried with
+exponential backoff and marked dead after OUTBOX_MAX_ATTEMPTS.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Drop-in replacement for send_mail() that only writes the outbox row."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Backoff after the `attempts`-th failed try: base * 2^(n-1), capped."""
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size, due_before=None):
+    """
+    Lease up to `batch_size` due messages to this worker by pushing their
+    next_attempt_at past the lease time. A worker that dies mid-batch simply
+    lets the lease run out and the rows become due again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(status=OutboxEmail.PENDING, next_attempt_at__lte=due_before or now)
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return []
+        lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        OutboxEmail.objects.filter(id__in=ids).update(next_attempt_at=lease_until)
+    return list(OutboxEmail.objects.filter(id__in=ids).order_by("id"))
+
+
+def _record_failure(message, exc):
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxEmail.DEAD
+        logger.error("Outbox email %s dead after %s attempts: %s", message.pk, message.attempts, exc)
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+    message.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_batch(messages, connection):
+    """Send claimed rows over an open connection; returns (sent, failed)."""
+    sent = failed = 0
+    sent_ids = []
+    for message in messages:
+        email = EmailMessage(message.subject, message.body, message.from_email, message.to,
+                             connection=connection)
+        try:
+            # one message per call so a rejected recipient fails only its own row
+            connection.send_messages([email])
+        except Exception as exc:
+            _record_failure(message, exc)
+            failed += 1
+        else:
+            sent_ids.append(message.pk)
+            sent += 1
+    if sent_ids:
+        OutboxEmail.objects.filter(id__in=sent_ids).update(
+            status=OutboxEmail.SENT, sent_at=timezone.now(),
+            attempts=F("attempts") + 1, last_error="",
+        )
+    return sent, failed
+
+
+def drain_outbox(batch_size=100, max_batches=None):
+    """
+    Send everything due when the call starts; messages rescheduled by a
+    failure wait for a later run. Returns {"sent", "failed", "batches"}.
+    The backend connection is opened once and reused for every batch.
+    """
+    started = timezone.now()
+    totals = {"sent": 0, "failed": 0, "batches": 0}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        while max_batches is None or totals["batches"] < max_batches:
+            messages = claim_batch(batch_size, due_before=started)
+            if not messages:
+                break
+            sent, failed = send_batch(messages, connection)
+            totals["sent"] += sent
+            totals["failed"] += failed
+            totals["batches"] += 1
+    finally:
+        connection.close()
+    return totals
+
+
+def outbox_metrics():
+    """Queue depth, lag of the oldest due message and last-hour throughput."""
+    now = timezone.now()
+    pending = OutboxEmail.objects.filter(status=OutboxEmail.PENDING)
+    oldest = pending.filter(next_attempt_at__lte=now).aggregate(oldest=Min("created_at"))["oldest"]
+    sent_recently = OutboxEmail.objects.filter(status=OutboxEmail.SENT, sent_at__gte=now - timedelta(hours=1)).count()
+    return {
+        "pending": pending.count(),
+        "retrying": pending.filter(attempts__gt=0).count(),
+        "dead": OutboxEmail.objects.filter(status=OutboxEmail.DEAD).count(),
+        "queue_lag_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+        "sent_last_hour": sent_recently,
+        "sent_per_minute": round(sent_recently / 60, 2),
+    }
@@ -1,3 +1,269 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+
+from courses.favorites import set_favorite
+from courses.models import Course, Enrollment, Favorite
+from .hashers import hasher_at
+from .models import OutboxEmail, PasswordResetCode, StatCounter
+from .otp import VALID, consume_code, issue_code, purge_expired_codes
+from .outbox import drain_outbox, outbox_metrics, queue_mail
+
+User = get_user_model()
+
+
+class StatCounterTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user("s1@example.com", "Student One", "pass-12345")
+        self.course = Course.objects.create(title="Algebra", description="Numbers")
+
+    def test_counters_follow_signals(self):
+        other = Course.objects.create(title="Biology", description="Cells")
+        Favorite.objects.create(user=self.student, course=self.course)
+        set_favorite(self.student, other.pk, True)
+        set_favorite(self.student, other.pk, True)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.assertEqual(StatCounter.snapshot(), {
+            StatCounter.STUDENTS: 1, StatCounter.COURSES: 2,
+            StatCounter.FAVORITES: 2, StatCounter.ENROLLMENTS: 1,
+        })
+
+        set_favorite(self.student, other.pk, False)
+        other.delete()
+        self.student.delete()
+        self.assertEqual(StatCounter.snapshot(), {
+            StatCounter.STUDENTS: 0, StatCounter.COURSES: 1,
+            StatCounter.FAVORITES: 0, StatCounter.ENROLLMENTS: 0,
+        })
+
+    def test_rebuild_stats_fixes_drift(self):
+        StatCounter.objects.filter(key=StatCounter.STUDENTS).update(value=99)
+        call_command("rebuild_stats", stdout=StringIO())
+        self.assertEqual(StatCounter.snapshot()[StatCounter.STUDENTS], 1)
+
+
+class DashboardQueryTests(TestCase):
+    def test_admin_dashboard_queries_do_not_grow_with_students(self):
+        admin = User.objects.create_user("admin@example.com", "Admin", "pass-12345", is_admin=True, is_student=False)
+        self.client.force_login(admin)
+        url = reverse("accounts:dashboard")
+
+        self.client.get(url)
+        with self.assertNumQueries(4) as few:
+            self.client.get(url)
+
+        for i in range(20):
+            user = User.objects.create_user(f"s{i}@example.com", "Student", "pass-12345")
+            Favorite.objects.create(user=user, course=Course.objects.create(title=f"C{i}", description="d"))
+        with self.assertNumQueries(len(few.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.context["stats"]["favorites_count"], 20)
+
+
+class ProfileBackendTests(TestCase):
+    def test_profile_arrives_with_the_session_user(self):
+        student = User.objects.create_user("s1@example.com", "Student One", "pass-12345")
+        self.assertTrue(self.client.login(email="s1@example.com", password="pass-12345"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("accounts:profile"))
+        self.assertEqual(response.context["current_profile"], student.studentprofile)
+        self.assertEqual(response.context["current_user_display_name"], "Student One")
+        profile_queries = [q["sql"] for q in ctx.captured_queries if "accounts_studentprofile" in q["sql"]]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertIn("JOIN", profile_queries[0])
+
+    def test_failed_login_hashes_once(self):
+        User.objects.create_user("s1@example.com", "Student One", "pass-12345")
+        hasher = hasher_at("pbkdf2_sha256", 1000)
+        for email in ("s1@example.com", "nobody@example.com"):
+            with self.subTest(email), mock.patch("django.contrib.auth.hashers.get_hasher", return_value=hasher), \
+                    mock.patch.object(hasher, "encode", wraps=hasher.encode) as encode:
+                self.assertFalse(self.client.login(email=email, password="wrong-password"))
+                self.assertEqual(encode.call_count, 1)
+
+    def test_old_sessions_move_to_the_profile_backend(self):
+        from django.apps import apps
+        from django.contrib.sessions.backends.db import SessionStore
+
+        student = User.objects.create_user("s1@example.com", "Student One", "pass-12345")
+        session = SessionStore()
+        session.update({"_auth_user_id": str(student.pk), "_auth_user_hash": student.get_session_auth_hash(),
+                        "_auth_user_backend": "django.contrib.auth.backends.ModelBackend"})
+        session.create()
+        import_module("accounts.migrations.0010_sessions_profile_backend").move_sessions(apps, None)
+
+        self.client.cookies["sessionid"] = session.session_key
+        self.assertEqual(self.client.get(reverse("accounts:profile")).status_code, 200)
+        self.assertEqual(SessionStore(session.session_key).load()["_auth_user_backend"],
+                         "accounts.backends.ProfileBackend")
+
+
+class SessionStoreTests(TestCase):
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+        MESSAGE_STORAGE="django.contrib.messages.storage.cookie.CookieStorage",
+    )
+    def test_cookie_mode_keeps_sessions_and_messages_out_of_the_database(self):
+        student = User.objects.create_user("s1@example.com", "Student One", "pass-12345")
+        course = Course.objects.create(title="Algebra", description="Numbers")
+        self.client.force_login(student)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("courses:toggle_favorite", args=[course.pk]), follow=True)
+        self.assertContains(response, "Added Algebra to favorites.")
+        self.assertFalse([q for q in ctx.captured_queries if "django_session" in q["sql"]])
+
+
+class ManageUsersTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("admin@example.com", "Admin", "pass-12345", is_admin=True, is_student=False)
+        joined = timezone.now()
+        User.objects.bulk_create(
+            User(email=f"Student{i}@example.com", name=f"Pupil {i}", is_active=i % 4 != 0,
+                 date_joined=joined - timedelta(minutes=i))
+            for i in range(12)
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse("accounts:manage_users")
+
+    def emails(self, response):
+        return [user.email for user in response.context["users"]]
+
+    def test_pages_follow_cursor_without_gaps(self):
+        seen, cursor = [], None
+        with mock.patch("accounts.views.ManageUsersView.paginate_by", 5):
+            while True:
+                response = self.client.get(self.url, {"role": "student", "cursor": cursor or ""})
+                seen += self.emails(response)
+                page = response.context["page"]
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+        self.assertEqual(seen, [f"Student{i}@example.com" for i in range(12)])
+
+    def test_prefix_search_and_filters(self):
+        response = self.client.get(self.url, {"q": "student1"})
+        self.assertEqual(self.emails(response), ["Student1@example.com", "Student10@example.com", "Student11@example.com"])
+        response = self.client.get(self.url, {"q": "PUPIL 1", "status": "active"})
+        self.assertEqual(self.emails(response), ["Student1@example.com", "Student10@example.com", "Student11@example.com"])
+        response = self.client.get(self.url, {"status": "inactive"})
+        self.assertEqual(self.emails(response), ["Student0@example.com", "Student4@example.com", "Student8@example.com"])
+        response = self.client.get(self.url, {"role": "staff"})
+        self.assertEqual(self.emails(response), ["admin@example.com"])
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BASE_SECONDS=0)
+class OutboxTests(TestCase):
+    def test_reset_request_queues_instead_of_sending(self):
+        User.objects.create_user("otp@example.com", "Otp", "pass-12345")
+        self.client.post(reverse("accounts:reset_password"), {"email": "otp@example.com"})
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(outbox_metrics()["pending"], 1)
+
+        self.assertEqual(drain_outbox()["sent"], 1)
+        self.assertEqual(mail.outbox[0].to, ["otp@example.com"])
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.SENT)
+
+    def test_failures_retry_then_dead_letter(self):
+        queue_mail("Hi", "Body", None, ["a@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=SMTPException("421 try later")):
+            self.assertEqual(drain_outbox(), {"sent": 0, "failed": 1, "batches": 1})
+            message = OutboxEmail.objects.get()
+            self.assertEqual((message.status, message.attempts), (OutboxEmail.PENDING, 1))
+            drain_outbox()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxEmail.DEAD)
+        self.assertIn("421 try later", message.last_error)
+        self.assertEqual(drain_outbox()["sent"], 0)
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            queue_mail(f"Note {i}", "Body", None, [f"u{i}@example.com"])
+        with tempfile.TemporaryDirectory() as outdir:
+            with override_settings(EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend",
+                                   EMAIL_FILE_PATH=outdir):
+                self.assertEqual(drain_outbox(batch_size=2)["batches"], 3)
+            # the file backend writes one file per opened connection
+            self.assertEqual(len(os.listdir(outdir)), 1)
+
+
+class PasswordResetCodeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("Reset@example.com", "Reset", "old-pass-123")
+
+    def confirm(self, otp, password="new-pass-456"):
+        return self.client.post(reverse("accounts:reset_password_confirm"), {
+            "user_id": self.user.pk, "otp": otp, "new_password1": password, "new_password2": password,
+        })
+
+    def test_reset_flow_stores_only_a_hash(self):
+        self.client.post(reverse("accounts:reset_password"), {"email": "reset@EXAMPLE.com"})
+        otp = OutboxEmail.objects.get().body.split(": ")[1][:6]
+        stored = PasswordResetCode.objects.get(user=self.user)
+        self.assertNotIn(otp, stored.code_hash)
+
+        self.assertContains(self.confirm("000000" if otp != "000000" else "111111"), "Invalid OTP")
+        self.assertRedirects(self.confirm(otp), reverse("accounts:login"), fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("new-pass-456"))
+        # spent
+        self.assertContains(self.confirm(otp), "Invalid OTP")
+
+    def test_verification_is_one_statement(self):
+        otp = issue_code(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(consume_code(self.user.pk, otp), VALID)
+
+    def test_expired_codes_are_refused_and_purged(self):
+        otp = issue_code(self.user)
+        PasswordResetCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertContains(self.confirm(otp), "OTP expired")
+
+        other = User.objects.create_user("fresh@example.com", "Fresh", "pass-12345")
+        issue_code(other)
+        self.assertEqual(purge_expired_codes(batch_size=1), 1)
+        out = StringIO()
+        call_command("purge_reset_codes", stdout=out)
+        self.assertIn("Deleted 0", out.getvalue())
+        self.assertEqual(list(PasswordResetCode.objects.values_list("user_id", flat=True)), [other.pk])
+
+
+class PasswordHasherTests(TestCase):
+    @override_settings(PASSWORD_HASH_COST=2000)
+    def test_login_rehashes_passwords_stored_at_another_cost(self):
+        user = User.objects.create(email="hash@example.com", name="Hash",
+                                   password=make_password("pass-12345", hasher=hasher_at("pbkdf2_sha256", 1000)))
+        response = self.client.post(reverse("accounts:login"), {"username": "hash@example.com", "password": "pass-12345"})
+        self.assertRedirects(response, reverse("accounts:dashboard"), fetch_redirect_response=False)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(user.check_password("pass-12345"))
+
+    def test_calibration_never_goes_below_the_floor(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = os.path.join(directory, "hasher.env")
+            with open(env, "w") as f:
+                f.write("DJANGO_DEBUG=False\nPASSWORD_HASH_COST=1\n")
+            out = StringIO()
+            call_command("calibrate_hasher", target_ms=1, samples=1, hashers="pbkdf2_sha256", write=env, stdout=out)
+            with open(env) as f:
+                self.assertEqual(f.read().split(), [
+                    "DJANGO_DEBUG=False", "PASSWORD_HASHER=pbkdf2_sha256", "PASSWORD_HASH_COST=600000",
+                ])
+        self.assertIn("exceeds the target", out.getvalue())
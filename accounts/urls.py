@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     LandingView, RegisterView, CustomLoginView, CustomLogoutView,
     ProfileView, ManageUsersView, EditUserView, DeleteUserView,
     PasswordResetRequestView, PasswordResetConfirmView, PasswordResetDoneView,
-    DashboardView
+    DashboardView, OutboxMetricsView
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import DashboardView, LandingView  # noqa: F811
+
 app_name = "accounts"
 
 urlpatterns = [
@@ -20,6 +24,7 @@ urlpatterns = [
     path("manage_users/", ManageUsersView.as_view(), name="manage_users"),
     path("edit_user/<int:pk>/", EditUserView.as_view(), name="edit_user"),
     path("delete_user/<int:pk>/", DeleteUserView.as_view(), name="delete_user"),
+    path("ops/outbox/", OutboxMetricsView.as_view(), name="outbox_metrics"),
 
     # password reset (OTP)
     path("reset_password/", PasswordResetRequestView.as_view(), name="reset_password"),
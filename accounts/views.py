@@ -1,22 +1,27 @@
 # accounts/views.py
-import random
-from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views import View
+from django.http import JsonResponse
 from django.views.generic import TemplateView
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from django.urls import reverse_lazy
 
 from .forms import (
     UserRegisterForm, UserLoginForm, ProfileForm, AvatarForm,
-    PasswordResetRequestForm, PasswordResetConfirmForm
+    PasswordResetRequestForm, PasswordResetConfirmForm, UserFilterForm
 )
-from .models import StudentProfile
+from .models import StatCounter
+from .otp import EXPIRED, VALID, consume_code, issue_code
+from .outbox import outbox_metrics, queue_mail
 from courses.models import Course
+from courses.favorites import get_favorite_ids
+from courses.pagination import KeysetPaginator
 
 User = get_user_model()
 
@@ -28,13 +33,7 @@ class LandingView(View):
         # featured: just titles + descriptions (no course images shown on landing)
         featured = Course.objects.all().order_by("-created_at")[:6]
 
-        if request.user.is_authenticated:
-            profile = getattr(request.user, "studentprofile", None)
-            favorite_ids = set(
-                profile.favorite_courses.values_list("id", flat=True)
-            ) if profile else set()
-        else:
-            favorite_ids = set()
+        favorite_ids = get_favorite_ids(request.user)
 
         return render(request, self.template_name, {
             "featured": featured,
@@ -128,12 +127,48 @@ class ProfileView(LoginRequiredMixin, View):
 
 
 # ---------- Admin User Management ----------
+def filter_users(queryset, q="", role="", status=""):
+    """
+    Apply the Manage Users search and filters. The search is a prefix match
+    on email or name, written as a range on lower(...) so the expression
+    indexes on User can serve it.
+    """
+    prefix = q.strip().lower()
+    if prefix:
+        upper = prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 0x10FFFF))
+        queryset = queryset.alias(email_lower=Lower("email"), name_lower=Lower("name")).filter(
+            Q(email_lower__gte=prefix, email_lower__lt=upper) | Q(name_lower__gte=prefix, name_lower__lt=upper)
+        )
+    # Value() keeps these as "col = %s"; a bare boolean column in WHERE is
+    # not matched against an index by SQLite
+    if role:
+        queryset = queryset.filter(is_student=Value(role == "student"))
+    if status:
+        queryset = queryset.filter(is_active=Value(status == "active"))
+    return queryset
+
+
 class ManageUsersView(LoginRequiredMixin, AdminRequiredMixin, View):
     template_name = "accounts/manage_users.html"
+    paginate_by = 50
 
     def get(self, request):
-        users = User.objects.all().order_by("-date_joined")
-        return render(request, self.template_name, {"users": users})
+        form = UserFilterForm(request.GET)
+        filters = form.cleaned_data if form.is_valid() else {}
+        users = filter_users(
+            User.objects.only("id", "name", "email", "is_admin", "is_active", "date_joined"), **filters
+        )
+        paginator = KeysetPaginator(users, self.paginate_by, field="date_joined")
+        page = paginator.get_page_or_first(request.GET.get("cursor"))
+
+        filter_query = request.GET.copy()
+        filter_query.pop("cursor", None)
+        return render(request, self.template_name, {
+            "users": page,
+            "page": page,
+            "form": form,
+            "filter_query": filter_query.urlencode(),
+        })
 
 
 class EditUserView(LoginRequiredMixin, AdminRequiredMixin, View):
@@ -162,6 +197,12 @@ class DeleteUserView(LoginRequiredMixin, AdminRequiredMixin, View):
         return redirect("accounts:manage_users")
 
 
+class OutboxMetricsView(LoginRequiredMixin, AdminRequiredMixin, View):
+    """Email outbox depth, lag and throughput as JSON, for monitoring."""
+    def get(self, request):
+        return JsonResponse(outbox_metrics())
+
+
 # ---------- OTP Password Reset ----------
 class PasswordResetRequestView(View):
     template_name = "accounts/reset_password.html"
@@ -174,17 +215,16 @@ class PasswordResetRequestView(View):
         if form.is_valid():
             email = form.cleaned_data["email"]
             try:
-                user = User.objects.get(email__iexact=email)
+                # lower(email) = ... uses user_email_lower_idx; iexact would scan
+                user = User.objects.alias(email_lower=Lower("email")).get(email_lower=email.lower())
             except User.DoesNotExist:
                 messages.success(request, "If this email exists, an OTP has been sent.")
                 return redirect("accounts:reset_password_done")
 
-            otp = f"{random.randint(0, 999999):06d}"
-            user.otp = otp
-            user.otp_created_at = timezone.now()
-            user.save()
+            otp = issue_code(user)
 
-            send_mail(
+            # delivered by `manage.py send_outbox`, never inside the request
+            queue_mail(
                 "Password reset OTP",
                 f"Your OTP for password reset is: {otp}\n"
                 f"It expires in {settings.OTP_EXPIRY_SECONDS // 60} minutes.",
@@ -226,18 +266,14 @@ class PasswordResetConfirmView(View):
                 form.add_error(None, "Invalid user.")
                 return render(request, self.template_name, {"form": form})
 
-            if not user.otp or user.otp != otp:
-                form.add_error("otp", "Invalid OTP")
-                return render(request, self.template_name, {"form": form})
+            with transaction.atomic():
+                outcome = consume_code(user.pk, otp)
+                if outcome != VALID:
+                    form.add_error("otp", "OTP expired" if outcome == EXPIRED else "Invalid OTP")
+                    return render(request, self.template_name, {"form": form})
 
-            if user.otp_created_at and (timezone.now() - user.otp_created_at).total_seconds() > settings.OTP_EXPIRY_SECONDS:
-                form.add_error("otp", "OTP expired")
-                return render(request, self.template_name, {"form": form})
-
-            user.set_password(new_password)
-            user.otp = None
-            user.otp_created_at = None
-            user.save()
+                user.set_password(new_password)
+                user.save(update_fields=["password"])
 
             messages.success(request, "Password reset successful. Please log in.")
             return redirect("accounts:login")
@@ -256,20 +292,17 @@ class DashboardView(LoginRequiredMixin, View):
         stats = {}
         recent_courses = Course.objects.all().order_by("-created_at")[:6]
 
+        counters = StatCounter.snapshot()
+
         if request.user.is_admin:
-            stats["students_count"] = User.objects.filter(is_student=True).count()
-            stats["courses_count"] = Course.objects.all().count()
-            stats["favorites_count"] = sum(
-                p.favorite_courses.count()
-                for p in StudentProfile.objects.all()
-            )
+            stats["students_count"] = counters.get(StatCounter.STUDENTS, 0)
+            stats["courses_count"] = counters.get(StatCounter.COURSES, 0)
+            stats["favorites_count"] = counters.get(StatCounter.FAVORITES, 0)
             favorite_ids = set()
         else:
-            profile = getattr(request.user, "studentprofile", None)
-            favorites = profile.favorite_courses.all() if profile else Course.objects.none()
-            stats["my_favorites_count"] = favorites.count()
-            stats["courses_count"] = Course.objects.all().count()
-            favorite_ids = set(favorites.values_list("id", flat=True))
+            favorite_ids = get_favorite_ids(request.user)
+            stats["my_favorites_count"] = len(favorite_ids)
+            stats["courses_count"] = counters.get(StatCounter.COURSES, 0)
 
         return render(request, self.template_name, {
             "stats": stats,
@@ -0,0 +1,99 @@
+# core/benchmarking.py
+"""
+Small helpers shared by the bench_* management commands.
+"""
+import importlib
+import itertools
+import statistics
+import string
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(q / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+def summarize(samples):
+    """p50/p95/p99/mean in milliseconds for a list of durations in seconds."""
+    ordered = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+    }
+
+
+def time_calls(fn, repeat):
+    """Call `fn` `repeat` times and return the individual durations in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_vocabulary(rng, size):
+    """Pseudo-words whose frequencies follow a Zipf distribution."""
+    words = sorted({"".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(size)})
+    rng.shuffle(words)
+    return words, zipf_weights(len(words))
+
+
+def zipf_weights(n):
+    """Cumulative 1/rank weights for random.choices(cum_weights=...)."""
+    return list(itertools.accumulate(1 / rank for rank in range(1, n + 1)))
+
+
+@contextmanager
+def rolled_back():
+    """Run a block inside a transaction that is always rolled back."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def bench_client(user=None):
+    """
+    An in-process test client that is allowed past ALLOWED_HOSTS and,
+    optionally, already logged in as `user`.
+    """
+    with override_settings(ALLOWED_HOSTS=["*"]):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        yield client
+
+
+def _reload_urlconfs():
+    for name in ("accounts.urls", "courses.urls", settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@contextmanager
+def async_views(enabled=True):
+    """
+    Route the read-heavy pages to their async (or sync) views for the
+    duration of the block, whatever settings.ASYNC_VIEWS says.
+    """
+    try:
+        with override_settings(ASYNC_VIEWS=enabled):
+            _reload_urlconfs()
+            yield
+    finally:
+        _reload_urlconfs()
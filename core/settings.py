@@ -3,6 +3,8 @@ from pathlib import Path
 import os
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY
@@ -24,6 +26,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # serves collected static files when STATIC_SERVE is on, before sessions/auth
+    "core.staticfiles.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -32,6 +36,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# One backend only: each listed ModelBackend would hash the password again on
+# a failed login. Migration accounts.0010 moved older database sessions over.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.ProfileBackend",
+]
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -53,6 +63,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Route the read-heavy pages to their native async versions (accounts and
+# courses async_views). Off by default, under ASGI too: the concurrency bench
+# measured them slower than the sync views, so only opt in (set
+# DJANGO_ASYNC_VIEWS=True) once it shows a gain for the deployment.
+ASYNC_VIEWS = os.environ.get("DJANGO_ASYNC_VIEWS", "False") == "True"
+
 # DB - keep existing sqlite for dev, but use env for production
 DATABASES = {
     "default": {
@@ -60,6 +76,67 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
     }
 }
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # a file (not the shared in-memory default) so threaded tests get real
+    # database locking instead of "table is locked" errors
+    DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
+
+# Cache - local memory for dev/tests, point at memcached/redis in production
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+    # the default of 300 entries is less than one page of cached course cards
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000))}
+
+# Sessions and flash messages. "db" costs a session SELECT on every request
+# (plus an UPDATE whenever it changes); "cached_db" reads through the cache
+# and only falls back to the table on a miss; "signed_cookies" keeps the
+# session in the client's cookie and never touches the database. Only use
+# "cache" with a shared cache backend: sessions vanish when it evicts.
+# `manage.py bench_sessions` compares the modes.
+def _env_choice(name, choices, default):
+    """choices[os.environ[name]] (default key if unset); unknown names are a configuration error."""
+    value = os.environ.get(name, default)
+    if value not in choices:
+        raise ImproperlyConfigured(f"{name}={value!r}; expected one of: {', '.join(choices)}")
+    return choices[value]
+
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = _env_choice("SESSION_STORE", SESSION_ENGINES, "db")
+
+# "fallback" keeps messages in a cookie and spills into the session only
+# when they do not fit; "session" always writes them to the session.
+MESSAGE_STORAGES = {
+    "fallback": "django.contrib.messages.storage.fallback.FallbackStorage",
+    "cookie": "django.contrib.messages.storage.cookie.CookieStorage",
+    "session": "django.contrib.messages.storage.session.SessionStorage",
+}
+MESSAGE_STORAGE = _env_choice("MESSAGE_STORE", MESSAGE_STORAGES, "fallback")
+
+# Hasher for new passwords and its work factor (0 = Django's default); see
+# accounts.hashers and `manage.py calibrate_hasher`. The rest still verify
+# older hashes, which are re-encoded with the preferred one at next login.
+PASSWORD_HASHER_CLASSES = {
+    "pbkdf2_sha256": "accounts.hashers.PBKDF2PasswordHasher",
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+    "bcrypt_sha256": "accounts.hashers.BCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2_sha256")
+PASSWORD_HASH_COST = int(os.environ.get("PASSWORD_HASH_COST", 0))
+PASSWORD_HASHERS = [_env_choice("PASSWORD_HASHER", PASSWORD_HASHER_CLASSES, "pbkdf2_sha256")] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -77,6 +154,17 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# serve STATIC_ROOT from the app server (core.staticfiles); runserver does it under DEBUG
+STATIC_SERVE = os.environ.get("DJANGO_STATIC_SERVE", str(not DEBUG)) == "True"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # hashed names need a collectstatic run, so only outside DEBUG
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG
+        else "core.staticfiles.CompressedManifestStaticFilesStorage",
+    },
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -93,9 +181,32 @@ LOGIN_URL = "accounts:login"
 EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
 
+# Email outbox drained by `manage.py send_outbox`
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get("OUTBOX_RETRY_BASE_SECONDS", 30))
+OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get("OUTBOX_RETRY_MAX_SECONDS", 60 * 60))
+OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", 5 * 60))
+
 # OTP settings
 OTP_EXPIRY_SECONDS = int(os.environ.get("OTP_EXPIRY_SECONDS", 15 * 60))  # 15 minutes default
 
+# Cached per-user favorite course ids
+FAVORITE_IDS_CACHE_SECONDS = int(os.environ.get("FAVORITE_IDS_CACHE_SECONDS", 60 * 60))
+
+# Course search: queries matching more courses than this rank only the
+# newest this many (the search page says so); fewer are ranked in full
+COURSE_SEARCH_MAX_CANDIDATES = int(os.environ.get("COURSE_SEARCH_MAX_CANDIDATES", 2000))
+
+# Cohort enrollment: rows per INSERT (the backend may lower it) and the
+# largest students x courses product one request may ask for
+BULK_ENROLL_BATCH_SIZE = int(os.environ.get("BULK_ENROLL_BATCH_SIZE", 2000))
+BULK_ENROLL_MAX_PAIRS = int(os.environ.get("BULK_ENROLL_MAX_PAIRS", 200_000))
+
+# Resized image variants: built on a thread pool after upload
+IMAGE_VARIANTS_ASYNC = os.environ.get("IMAGE_VARIANTS_ASYNC", "True") == "True"
+IMAGE_VARIANT_WORKERS = int(os.environ.get("IMAGE_VARIANT_WORKERS", 2))
+
 # Messages
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {messages.DEBUG: "debug", messages.INFO: "info", messages.SUCCESS: "success", messages.WARNING: "warning", messages.ERROR: "danger"}
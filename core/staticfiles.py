@@ -0,0 +1,152 @@
+# core/staticfiles.py
+"""
+Fingerprinted, precompressed static files and an in-process server for them.
+
+CompressedManifestStaticFilesStorage is ManifestStaticFilesStorage (content
+hashed names plus staticfiles.json) that also writes .gz and .br siblings of
+every text asset during collectstatic, so nothing is compressed per request.
+
+StaticFilesMiddleware serves STATIC_ROOT from the WSGI/ASGI process when
+settings.STATIC_SERVE is on (the default outside DEBUG, where runserver
+serves static files itself). It indexes STATIC_ROOT once at startup, picks
+the best precompressed sibling the client accepts and marks hashed names
+immutable; a hashed name changes whenever its content does. Under ASGI
+the file is read in a worker thread and sent as one body, since a streamed
+file would be iterated synchronously on the event loop.
+"""
+import gzip
+import mimetypes
+import os
+from email.utils import parsedate_to_datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".map", ".json", ".svg", ".txt", ".xml", ".html"}
+# keep a compressed copy only if it saves at least this much
+MIN_SAVING = 0.05
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# unhashed names can change under the same URL
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+# best first; the value is the sibling file suffix
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data):
+    """{suffix: compressed bytes} for the encodings worth keeping."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: blob for suffix, blob in variants.items() if len(blob) <= len(data) * (1 - MIN_SAVING)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in {*paths, *self.hashed_files.values()}:
+            if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                with self.open(name) as f:
+                    data = f.read()
+                for suffix, blob in compress(data).items():
+                    with open(self.path(name + suffix), "wb") as f:
+                        f.write(blob)
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0) from an Accept-Encoding value."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.files = self.scan(settings.STATIC_ROOT)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def scan(root):
+        """{url path: (file path, {coding: sibling path}, immutable)} for STATIC_ROOT."""
+        hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        suffixes = {suffix for _, suffix in ENCODINGS}
+        files = {}
+        for directory, _, names in os.walk(root):
+            for filename in names:
+                if os.path.splitext(filename)[1] in suffixes:
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                siblings = {coding: path + suffix for coding, suffix in ENCODINGS if os.path.exists(path + suffix)}
+                files[settings.STATIC_URL + name] = (path, siblings, name in hashed)
+        return files
+
+    def serve(self, request, buffered=False):
+        """The response for a static file, or None; `buffered` reads it into memory instead of streaming it."""
+        if request.method not in ("GET", "HEAD") or request.path not in self.files:
+            return None
+        path, siblings, immutable = self.files[request.path]
+        stat = os.stat(path)
+        if not immutable and (since := request.headers.get("If-Modified-Since")):
+            try:
+                if int(stat.st_mtime) <= parsedate_to_datetime(since).timestamp():
+                    return HttpResponseNotModified()
+            except (TypeError, ValueError):
+                pass
+
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        coding = next((c for c, _ in ENCODINGS if c in siblings and (c in accepted or "*" in accepted)), None)
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or "application/octet-stream"
+        if buffered:
+            with open(siblings[coding] if coding else path, "rb") as f:
+                response = HttpResponse(f.read(), content_type=content_type)
+            response.headers["Content-Length"] = len(response.content)
+        else:
+            response = FileResponse(open(siblings[coding] if coding else path, "rb"), content_type=content_type)
+            del response["Content-Disposition"]  # derived from the sibling's file name
+        if coding:
+            response.headers["Content-Encoding"] = coding
+        if siblings:
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        response.headers["Last-Modified"] = http_date(stat.st_mtime)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path in self.files:
+            response = await sync_to_async(self.serve, thread_sensitive=False)(request, buffered=True)
+            if response is not None:
+                return response
+        return await self.get_response(request)
@@ -0,0 +1,186 @@
+# core/testing.py
+"""
+Route budget harness used by core/tests.py.
+
+Every named route in accounts/urls.py and courses/urls.py is requested as an
+anonymous user, a student and an admin against a seeded dataset, and the
+query count and wall time are compared with core/query_budgets.json. Run the
+suite with UPDATE_QUERY_BUDGETS=1 to rewrite that file from what was measured.
+"""
+import json
+import time
+from collections import namedtuple
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import StudentProfile
+from courses.models import Course, Enrollment, Favorite
+from courses.search import rebuild_index
+
+BUDGET_FILE = Path(__file__).with_name("query_budgets.json")
+ROLES = ("anonymous", "student", "admin")
+# wall-time budgets written by UPDATE_QUERY_BUDGETS: generous, CI is noisy
+MIN_MS_BUDGET = 250
+MS_HEADROOM = 4
+
+User = get_user_model()
+
+# kwargs/query/data are dicts or callables taking the seeded dataset
+Route = namedtuple("Route", "name method kwargs query data", defaults=("get", None, None, None))
+
+
+def _first_course(d):
+    return {"pk": d.courses[0].pk}
+
+
+ROUTES = [
+    Route("accounts:landing"),
+    Route("accounts:register"),
+    Route("accounts:login"),
+    Route("accounts:logout", "post"),
+    Route("accounts:dashboard"),
+    Route("accounts:profile"),
+    Route("accounts:manage_users"),
+    Route("accounts:edit_user", kwargs=lambda d: {"pk": d.students[0].pk}),
+    Route("accounts:delete_user", "post", kwargs=lambda d: {"pk": d.spare_user().pk}),
+    Route("accounts:outbox_metrics"),
+    Route("accounts:reset_password"),
+    Route("accounts:reset_password_done"),
+    Route("accounts:reset_password_confirm", query=lambda d: {"user_id": d.students[0].pk}),
+    Route("courses:course_list"),
+    Route("courses:course_search", query={"q": "course 1"}),
+    Route("courses:manage_courses"),
+    Route("courses:add_course"),
+    Route("courses:edit_course", kwargs=_first_course),
+    Route("courses:delete_course", "post", kwargs=lambda d: {"pk": d.spare_course().pk}),
+    Route("courses:course_detail", kwargs=_first_course),
+    Route("courses:toggle_favorite", "post", kwargs=_first_course),
+    Route("courses:api_favorites_batch", "json",
+          data=lambda d: {"operations": [{"course": c.pk, "favorite": True} for c in d.courses[:20]]}),
+    Route("courses:api_favorite", "json", kwargs=_first_course, data={"favorite": True}),
+    Route("courses:enrollments_list"),
+    Route("courses:enrollments_export", query={"format": "csv"}),
+    Route("courses:api_enrollments_bulk", "json",
+          data=lambda d: {"students": [s.pk for s in d.students], "courses": [c.pk for c in d.courses[:5]]}),
+    Route("courses:my_courses"),
+    Route("courses:course_analytics"),
+]
+
+
+def seed_dataset(students=40, courses=120, favorites_per_student=8, enrollments_per_student=4):
+    """
+    A small but realistic catalog, written with bulk inserts; the counters and
+    the search index are rebuilt afterwards since bulk_create skips signals.
+    """
+    password = make_password("budget-pass-123")
+    admin = User.objects.create(email="budget-admin@example.com", name="Budget Admin",
+                                password=password, is_admin=True, is_student=False)
+    User.objects.bulk_create(
+        User(email=f"budget-student{i}@example.com", name=f"Student {i}", password=password)
+        for i in range(students)
+    )
+    student_list = list(User.objects.filter(is_student=True).order_by("id"))
+    StudentProfile.objects.bulk_create(StudentProfile(user=u, grade=70 + i % 30) for i, u in enumerate(student_list))
+
+    Course.objects.bulk_create(
+        Course(title=f"Course {i}", description=f"Course {i} covers topic {i % 17} in depth. " * 5)
+        for i in range(courses)
+    )
+    course_list = list(Course.objects.order_by("id"))
+    rebuild_index()
+
+    Favorite.objects.bulk_create(
+        Favorite(user=u, course=course_list[(i + k * 7) % courses])
+        for i, u in enumerate(student_list) for k in range(favorites_per_student)
+    )
+    Enrollment.objects.bulk_create(
+        Enrollment(student=u, course=course_list[(i * 3 + k) % courses], grade="ABCDF"[(i + k) % 5])
+        for i, u in enumerate(student_list) for k in range(enrollments_per_student)
+    )
+    call_command("rebuild_stats", stdout=StringIO())
+
+    counter = iter(range(10 ** 6))
+    return SimpleNamespace(
+        admin=admin,
+        students=student_list,
+        courses=course_list,
+        password=password,
+        spare_user=lambda: User.objects.create(email=f"spare{next(counter)}@example.com", name="Spare",
+                                               password=password, is_student=False),
+        spare_course=lambda: Course.objects.create(title="Spare", description="To be deleted"),
+    )
+
+
+def _resolve(value, dataset):
+    return value(dataset) if callable(value) else value
+
+
+def client_for(role, dataset):
+    client = Client()
+    if role == "student":
+        client.force_login(dataset.students[0])
+    elif role == "admin":
+        client.force_login(dataset.admin)
+    return client
+
+
+def measure(route, role, dataset):
+    """
+    Request `route` as `role` with a cold cache. Returns (response, captured
+    queries, elapsed ms); streamed bodies are consumed inside the capture.
+    """
+    client = client_for(role, dataset)
+    url = reverse(route.name, kwargs=_resolve(route.kwargs, dataset))
+    query = _resolve(route.query, dataset)
+    data = _resolve(route.data, dataset)
+    cache.clear()
+
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        if route.method == "get":
+            response = client.get(url, query)
+        elif route.method == "json":
+            response = client.post(url, json.dumps(data or {}), content_type="application/json")
+        else:
+            response = client.post(url, data or {})
+        if response.streaming:
+            b"".join(response.streaming_content)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    return response, ctx.captured_queries, elapsed_ms
+
+
+def load_budgets():
+    if not BUDGET_FILE.exists():
+        return {}
+    return json.loads(BUDGET_FILE.read_text())
+
+
+def write_budgets(measured):
+    """Rewrite the budget file from {route: {role: (queries, ms)}}."""
+    budgets = {
+        name: {
+            role: {"queries": queries, "ms": max(MIN_MS_BUDGET, round(ms * MS_HEADROOM, -1))}
+            for role, (queries, ms) in sorted(roles.items(), key=lambda item: ROLES.index(item[0]))
+        }
+        for name, roles in sorted(measured.items())
+    }
+    # one line per role keeps budget changes readable in diffs
+    lines = []
+    for name, roles in budgets.items():
+        entries = ",\n".join(f"    {json.dumps(role)}: {json.dumps(budget)}" for role, budget in roles.items())
+        lines.append(f"  {json.dumps(name)}: {{\n{entries}\n  }}")
+    BUDGET_FILE.write_text("{\n" + ",\n".join(lines) + "\n}\n")
+
+
+def format_queries(queries):
+    return "\n".join(f"  {i:>3}. {q['sql']}" for i, q in enumerate(queries, start=1))
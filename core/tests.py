@@ -0,0 +1,130 @@
+import gzip
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import get_resolver
+
+from .staticfiles import StaticFilesMiddleware, accepted_encodings, brotli
+from .testing import (
+    BUDGET_FILE, ROLES, ROUTES, format_queries, load_budgets, measure, seed_dataset, write_budgets,
+)
+
+
+class RouteBudgetTests(TestCase):
+    """
+    Query-count and wall-time budgets per route and role, from
+    core/query_budgets.json. UPDATE_QUERY_BUDGETS=1 rewrites the file.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset()
+
+    def test_every_route_is_covered(self):
+        named = set()
+        for namespace in ("accounts", "courses"):
+            resolver = get_resolver().namespace_dict[namespace][1]
+            named |= {f"{namespace}:{name}" for name in resolver.reverse_dict if isinstance(name, str)}
+        self.assertEqual(named - {route.name for route in ROUTES}, set(),
+                         "add new routes to core.testing.ROUTES")
+
+    def test_routes_stay_within_budget(self):
+        updating = os.environ.get("UPDATE_QUERY_BUDGETS") == "1"
+        budgets = load_budgets()
+        measured = {}
+
+        for route in ROUTES:
+            for role in ROLES:
+                with self.subTest(route=route.name, role=role):
+                    response, queries, elapsed_ms = measure(route, role, self.dataset)
+                    measured.setdefault(route.name, {})[role] = (len(queries), elapsed_ms)
+                    self.assertLess(response.status_code, 500)
+                    if updating:
+                        continue
+
+                    budget = budgets.get(route.name, {}).get(role)
+                    if budget is None:
+                        self.fail(f"No budget for {route.name} as {role} in {BUDGET_FILE.name}; "
+                                  f"run with UPDATE_QUERY_BUDGETS=1")
+                    if len(queries) > budget["queries"]:
+                        self.fail(
+                            f"{route.name} as {role}: {len(queries)} queries, budget "
+                            f"{budget['queries']}\n{format_queries(queries)}"
+                        )
+                    if elapsed_ms > budget["ms"]:
+                        self.fail(f"{route.name} as {role}: {elapsed_ms:.0f} ms, budget {budget['ms']} ms")
+
+        if updating:
+            write_budgets(measured)
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            STATIC_ROOT=root, STATIC_SERVE=True,
+            # just the project's own files; the admin's would only slow this down
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STORAGES={"staticfiles": {"BACKEND": "core.staticfiles.CompressedManifestStaticFilesStorage"}},
+        ))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.middleware = StaticFilesMiddleware(lambda request: None)
+
+    def get(self, url, **headers):
+        response = self.middleware(RequestFactory().get(url, headers=headers))
+        return response, b"".join(response.streaming_content)
+
+    def test_hashed_files_are_served_precompressed_and_immutable(self):
+        url = static("css/style.css")
+        self.assertRegex(url, r"^/static/css/style\.[0-9a-f]{12}\.css$")
+        with open(os.path.join(os.path.dirname(__file__), "..", "static", "css", "style.css"), "rb") as f:
+            original = f.read()
+
+        response, body = self.get(url, accept_encoding="gzip, deflate, br")
+        if brotli is not None:
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(brotli.decompress(body), original)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Content-Type"], "text/css")
+
+        response, body = self.get(url, accept_encoding="br;q=0, gzip")
+        self.assertEqual(gzip.decompress(body), original)
+        response, body = self.get(url)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(body, original)
+
+    def test_unhashed_names_revalidate(self):
+        response, _ = self.get("/static/css/style.css")
+        self.assertIn("must-revalidate", response["Cache-Control"])
+        response = self.middleware(RequestFactory().get(
+            "/static/css/style.css", headers={"if_modified_since": response["Last-Modified"]}))
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(self.middleware(RequestFactory().get("/courses/")))
+
+    def test_every_referenced_file_is_in_the_manifest(self):
+        self.assertRegex(static("img/default-avatar.png"), r"^/static/img/default-avatar\.[0-9a-f]{12}\.png$")
+        with self.assertRaises(ValueError):
+            static("img/missing.png")
+
+    async def test_async_responses_are_read_off_the_event_loop(self):
+        async def get_response(request):
+            return None
+
+        middleware = StaticFilesMiddleware(get_response)
+        url = static("css/style.css")
+        response = await middleware(AsyncRequestFactory().get(url, headers={"accept_encoding": "gzip"}))
+        # a streamed file would be iterated synchronously by the ASGI handler
+        self.assertFalse(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        with open(os.path.join(os.path.dirname(__file__), "..", "static", "css", "style.css"), "rb") as f:
+            self.assertEqual(gzip.decompress(response.content), f.read())
+        self.assertIsNone(await middleware(AsyncRequestFactory().get("/courses/")))
+
+    def test_accept_encoding_parsing(self):
+        self.assertEqual(accepted_encodings("gzip;q=0.8, BR, identity;q=0"), {"gzip", "br"})
+        self.assertEqual(accepted_encodings(""), set())
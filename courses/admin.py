@@ -1,6 +1,17 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .favorites import delete_favorites
+from .forms import GradeUploadForm
+from .grades import GradeFileError, import_grades, open_upload
 from .models import Course, Favorite, Enrollment
 
+# changes listed on the dry-run page; the totals cover the whole file
+GRADE_DIFF_PREVIEW = 200
+
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ("title", "created_at", "updated_at")
@@ -11,10 +22,60 @@ class CourseAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("user", "course", "created_at")
     list_filter = ("created_at",)
+    list_select_related = ("user", "course")
+    raw_id_fields = ("user", "course")
+
+    def delete_model(self, request, obj):
+        delete_favorites(Favorite.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_favorites(queryset)
 
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ("student", "course", "enrolled_on", "grade")
     list_filter = ("enrolled_on", "grade")
-    search_fields = ("student__username", "course__title")
+    search_fields = ("student__email", "course__title")
+    change_list_template = "admin/courses/enrollment/change_list.html"
+
+    def get_urls(self):
+        return [
+            path("upload-grades/", self.admin_site.admin_view(self.upload_grades_view),
+                 name="courses_enrollment_upload_grades"),
+            *super().get_urls(),
+        ]
+
+    def upload_grades_view(self, request):
+        """Set grades from a CSV; a dry run lists the changes without saving them."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        form = GradeUploadForm(request.POST or None, request.FILES or None)
+        result, diff = None, []
+
+        def preview(*change):
+            if len(diff) < GRADE_DIFF_PREVIEW:
+                diff.append(change)
+
+        if form.is_valid():
+            dry_run = form.cleaned_data["dry_run"]
+            try:
+                result = import_grades(open_upload(form.cleaned_data["file"]), dry_run, on_change=preview)
+            except GradeFileError as exc:
+                form.add_error("file", str(exc))
+            except UnicodeDecodeError:
+                form.add_error("file", "The file is not UTF-8 encoded text.")
+            else:
+                if not dry_run:
+                    self.message_user(request, f"{result['updated']} grade(s) updated, {result['unchanged']} "
+                                               f"unchanged, {result['failed']} row(s) skipped.")
+                    if not result["failed"]:
+                        return redirect("admin:courses_enrollment_changelist")
+        return TemplateResponse(request, "admin/courses/enrollment/upload_grades.html", {
+            **self.admin_site.each_context(request),
+            "title": "Upload grades",
+            "opts": self.model._meta,
+            "form": form,
+            "result": result,
+            "diff": diff,
+        })
@@ -0,0 +1,178 @@
+# courses/analytics.py
+"""
+Per-course grade analytics, materialized in CourseGradeStats.
+
+Enrollment.grade is free text. Each refresh pulls (course_id, grade) pairs in
+bulk, maps the handful of distinct grade strings to points once and then
+groups with NumPy (bincount over course indices, one lexsort for the
+percentiles) instead of looping over rows in Python. The receivers at the
+bottom mark a course's row stale when its enrollments change; bulk writers
+call mark_grade_stats_changed() themselves.
+"""
+import numpy as np
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Course, CourseGradeStats, Enrollment
+
+LETTERS = ("A", "B", "C", "D", "F")
+GRADE_POINTS = {
+    "A+": 4.0, "A": 4.0, "A-": 3.7,
+    "B+": 3.3, "B": 3.0, "B-": 2.7,
+    "C+": 2.3, "C": 2.0, "C-": 1.7,
+    "D+": 1.3, "D": 1.0, "D-": 0.7,
+    "F": 0.0,
+}
+PASS_POINTS = 0.7  # D- or better
+PERCENTILES = (("p25_points", 0.25), ("median_points", 0.5), ("p75_points", 0.75))
+# courses per query; keeps both the IN list and the arrays bounded
+COURSE_CHUNK_SIZE = 2000
+
+
+def _grade_columns(grades):
+    """
+    Points (NaN if not a recognised grade) and letter bucket (index into
+    LETTERS, len(LETTERS) for ungraded) for an array of grade strings.
+    """
+    distinct, inverse = np.unique(grades, return_inverse=True)
+    normalized = [g.strip().upper() for g in distinct]
+    points = np.array([GRADE_POINTS.get(g, np.nan) for g in normalized])
+    buckets = np.array([LETTERS.index(g[0]) if g in GRADE_POINTS else len(LETTERS) for g in normalized],
+                       dtype=np.int64)
+    return points[inverse], buckets[inverse]
+
+
+def _interpolate(sorted_points, starts, counts, q):
+    """Linear-interpolated q-quantile of every group in one pass."""
+    result = np.full(len(counts), np.nan)
+    has = counts > 0
+    position = starts[has] + q * (counts[has] - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    result[has] = sorted_points[low] + (sorted_points[high] - sorted_points[low]) * (position - low)
+    return result
+
+
+def compute_grade_stats(course_ids):
+    """
+    Grade statistics for `course_ids` as {course_id: field values}. Courses
+    without enrollments get a row of zeros.
+    """
+    course_ids = np.unique(np.asarray(course_ids, dtype=np.int64))
+    if not len(course_ids):
+        return {}
+    rows = list(
+        Enrollment.objects.filter(course_id__in=course_ids.tolist())
+        .values_list("course_id", Coalesce("grade", Value("")))
+    )
+    if rows:
+        enrolled_courses, grades = zip(*rows)
+        course_index = np.searchsorted(course_ids, np.array(enrolled_courses, dtype=np.int64))
+        points, buckets = _grade_columns(np.array(grades, dtype=str))
+    else:
+        course_index, points = np.empty(0, dtype=np.int64), np.empty(0)
+        buckets = np.empty(0, dtype=np.int64)
+
+    n = len(course_ids)
+    enrolled = np.bincount(course_index, minlength=n)
+    width = len(LETTERS) + 1
+    distribution = np.bincount(course_index * width + buckets, minlength=n * width).reshape(n, width)
+
+    graded_mask = ~np.isnan(points)
+    graded_index, graded_points = course_index[graded_mask], points[graded_mask]
+    graded = np.bincount(graded_index, minlength=n)
+    totals = np.bincount(graded_index, weights=graded_points, minlength=n)
+    passed = np.bincount(graded_index, weights=graded_points >= PASS_POINTS, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = totals / graded
+        pass_rate = passed / graded
+
+    # sort by (course, points) so every course's grades are one ascending run
+    order = np.lexsort((graded_points, graded_index))
+    sorted_points = graded_points[order]
+    starts = np.concatenate(([0], np.cumsum(graded)[:-1]))
+    quantiles = {name: _interpolate(sorted_points, starts, graded, q) for name, q in PERCENTILES}
+
+    def value(array, i):
+        return None if np.isnan(array[i]) else round(float(array[i]), 4)
+
+    stats = {}
+    for i, course_id in enumerate(course_ids.tolist()):
+        stats[course_id] = {
+            "enrolled": int(enrolled[i]),
+            "graded": int(graded[i]),
+            "mean_points": value(mean, i),
+            "pass_rate": value(pass_rate, i),
+            "distribution": dict(zip(LETTERS + ("ungraded",), distribution[i].tolist())),
+            **{name: value(quantiles[name], i) for name, _ in PERCENTILES},
+        }
+    return stats
+
+
+def refresh_grade_stats(course_ids):
+    """Recompute and store the rows for `course_ids`; returns how many."""
+    course_ids = list(course_ids)
+    fields = ["enrolled", "graded", "mean_points", "pass_rate", "distribution", "refreshed_at"]
+    fields += [name for name, _ in PERCENTILES]
+    for start in range(0, len(course_ids), COURSE_CHUNK_SIZE):
+        # stamped before reading, so a write that lands meanwhile leaves the row stale
+        refreshed_at = timezone.now()
+        stats = compute_grade_stats(course_ids[start:start + COURSE_CHUNK_SIZE])
+        CourseGradeStats.objects.bulk_create(
+            [CourseGradeStats(course_id=course_id, refreshed_at=refreshed_at, **values)
+             for course_id, values in stats.items()],
+            update_conflicts=True, unique_fields=["course"], update_fields=fields,
+        )
+    return len(course_ids)
+
+
+def stale_course_ids():
+    """Courses whose stats row is missing or older than their last enrollment change."""
+    missing = Course.objects.filter(grade_stats__isnull=True).values_list("id", flat=True)
+    stale = CourseGradeStats.objects.filter(
+        Q(refreshed_at__isnull=True) | Q(changed_at__gte=F("refreshed_at"))
+    ).values_list("course_id", flat=True)
+    return sorted({*missing, *stale})
+
+
+def refresh_stale_grade_stats():
+    return refresh_grade_stats(stale_course_ids())
+
+
+def refresh_shown_grade_stats(courses):
+    """
+    Refresh the missing or stale stats among `courses` (fetched with
+    grade_stats) and attach the new rows, so a page shows current numbers
+    without touching the rest of the site; returns how many.
+    """
+    def is_stale(course):
+        stats = getattr(course, "grade_stats", None)
+        return (stats is None or stats.refreshed_at is None
+                or (stats.changed_at is not None and stats.changed_at >= stats.refreshed_at))
+
+    course_ids = [course.id for course in courses if is_stale(course)]
+    if course_ids:
+        refresh_grade_stats(course_ids)
+        fresh = {stats.course_id: stats for stats in CourseGradeStats.objects.filter(course_id__in=course_ids)}
+        for course in courses:
+            if course.id in fresh:
+                course.grade_stats = fresh[course.id]
+    return len(course_ids)
+
+
+def refresh_all_grade_stats():
+    return refresh_grade_stats(Course.objects.order_by("id").values_list("id", flat=True))
+
+
+def mark_grade_stats_changed(course_ids):
+    """Flag the stats of `course_ids` for the next incremental refresh."""
+    CourseGradeStats.objects.filter(course_id__in=list(course_ids)).update(changed_at=timezone.now())
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def mark_course_grade_stats(sender, instance, **kwargs):
+    mark_grade_stats_changed([instance.course_id])
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        # connect the favorite-id cache, search index, image variant and grade stats receivers
+        from . import analytics, favorites, fragments, images, search  # noqa: F401
@@ -0,0 +1,65 @@
+# courses/async_views.py
+"""
+Native async versions of the read-heavy course pages; see
+accounts.async_views for how they are routed.
+"""
+from django.shortcuts import aget_object_or_404, render
+from django.views import View
+
+from accounts.async_views import AsyncUserMixin
+from .conditional import AsyncConditionalGetMixin, acourse_list_validators, acourse_validators
+from .favorites import aget_favorite_ids
+from .models import Course, Enrollment, Favorite
+from .pagination import KeysetPaginator
+from .recommendations import also_liked
+
+
+class CourseListView(AsyncUserMixin, AsyncConditionalGetMixin, View):
+    template_name = "courses/course_list.html"
+    paginate_by = 24
+    login_required = True
+
+    async def get_validators(self, request):
+        return await acourse_list_validators(request)
+
+    async def get(self, request):
+        paginator = KeysetPaginator(Course.objects.all(), self.paginate_by)
+        page = await paginator.aget_page_or_first(request.GET.get("cursor"))
+        return render(request, self.template_name, {
+            "courses": page,
+            "page": page,
+            "favorite_ids": await aget_favorite_ids(request.user),
+        })
+
+
+class CourseDetailView(AsyncUserMixin, AsyncConditionalGetMixin, View):
+    template_name = "courses/course_detail.html"
+    login_required = True
+
+    async def get_validators(self, request, pk):
+        return await acourse_validators(request, pk)
+
+    async def get(self, request, pk):
+        course = await aget_object_or_404(Course, pk=pk)
+        return render(request, self.template_name, {
+            "course": course,
+            "favorite_ids": await aget_favorite_ids(request.user),
+            "favorite_count": await Favorite.objects.filter(course_id=pk).acount(),
+            "also_liked": [neighbor async for neighbor in also_liked(pk)],
+        })
+
+
+class StudentEnrollmentsView(AsyncUserMixin, View):
+    template_name = "courses/my_courses.html"
+    login_required = True
+
+    async def get(self, request):
+        enrollments = [
+            enrollment async for enrollment in
+            Enrollment.objects.filter(student=request.user).select_related("course")
+        ]
+        return render(request, self.template_name, {
+            "my_courses": enrollments,
+            "object_list": enrollments,
+            "favorite_ids": await aget_favorite_ids(request.user),
+        })
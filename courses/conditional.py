@@ -0,0 +1,155 @@
+# courses/conditional.py
+"""
+ETag/Last-Modified validators for the course pages, so a browser
+revalidating an unchanged page gets a 304 before anything is rendered.
+
+Each page's server-side state comes from one cheap query: the maintained
+course counter and max(updated_at) for the course list, and for a course
+page its own row, its favorite count (off the (course, created_at, user)
+index) and when its "also liked" list was last refreshed. The ETag also
+mixes in what the page shows about the viewer: their favorites (from the
+cached id set), the navbar fields and the CSRF secret, since the forms on a
+cached page carry tokens derived from it. Only the ETag answers a
+conditional request; Last-Modified is sent for information but covers none
+of the per-viewer state. Pages with pending flash messages get no
+validators, so a message is never replayed.
+"""
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from accounts.models import StatCounter
+
+from .favorites import aget_favorite_ids, encode_ids, get_favorite_ids
+from .models import Course, Favorite
+
+COURSE_STATE_FIELDS = (
+    "updated_at", "neighbor_state__refreshed_at", "neighbors_updated_at", "neighbor_count", "favorite_count",
+)
+
+
+def _course_list_state():
+    # the maintained counter plus the newest updated_at (off its index): adds,
+    # edits and deletes all move one of them without counting the table
+    return (
+        StatCounter.objects.filter(key=StatCounter.COURSES)
+        .annotate(updated_at=Subquery(Course.objects.order_by("-updated_at").values("updated_at")[:1]))
+        .values_list("value", "updated_at")
+    )
+
+
+def _course_state(pk):
+    # the "also liked" panel shows neighbor titles, so their edits count too
+    return (
+        Course.objects.filter(pk=pk)
+        .annotate(
+            neighbors_updated_at=Max("neighbors__neighbor__updated_at"), neighbor_count=Count("neighbors"),
+            favorite_count=Subquery(
+                Favorite.objects.filter(course_id=OuterRef("pk")).order_by()
+                .values("course_id").annotate(n=Count("*")).values("n")
+            ),
+        )
+        .values_list(*COURSE_STATE_FIELDS)
+    )
+
+
+def _viewer(request, favorites):
+    user = request.user
+    profile = getattr(user, "studentprofile", None)
+    if "CSRF_COOKIE" not in request.META:
+        get_token(request)  # a first visit gets its secret now, so the next request's ETag matches
+    return (
+        user.pk, user.name, user.email, user.is_admin, user.is_student,
+        profile and profile.avatar.name, profile and profile.avatar_variants,
+        request.META["CSRF_COOKIE"], favorites,
+    )
+
+
+def _validators(request, state, favorites, timestamps):
+    """(weak ETag, Last-Modified timestamp), or None when the page must not be validated."""
+    if state is None or len(get_messages(request)):
+        return None
+    digest = hashlib.blake2b(repr((state, _viewer(request, favorites))).encode(), digest_size=16)
+    timestamps = [t for t in timestamps if t is not None]
+    # weak: CSRF masking makes every rendering differ byte-wise
+    return f'W/"{digest.hexdigest()}"', int(max(timestamps).timestamp()) if timestamps else None
+
+
+def course_list_validators(request):
+    state = _course_list_state().first()
+    favorites = encode_ids(get_favorite_ids(request.user))
+    return _validators(request, state, favorites, state[1:] if state else [])
+
+
+async def acourse_list_validators(request):
+    state = await _course_list_state().afirst()
+    favorites = encode_ids(await aget_favorite_ids(request.user))
+    return _validators(request, state, favorites, state[1:] if state else [])
+
+
+def course_validators(request, pk):
+    state = _course_state(pk).first()
+    favorite = pk in get_favorite_ids(request.user)
+    return _validators(request, state, favorite, state[:3] if state else [])
+
+
+async def acourse_validators(request, pk):
+    state = await _course_state(pk).afirst()
+    favorite = pk in await aget_favorite_ids(request.user)
+    return _validators(request, state, favorite, state[:3] if state else [])
+
+
+def not_modified(request, validators):
+    """The 304 (or 412) response for `validators`, or None to render the page."""
+    if validators is None:
+        return None
+    etag, _ = validators
+    # the ETag alone: Last-Modified misses favorite, deletion and CSRF changes,
+    # so an If-Modified-Since-only request always gets the page
+    return get_conditional_response(request, etag=etag)
+
+
+def add_validators(response, validators):
+    if validators is not None and response.status_code in (200, 304):
+        etag, last_modified = validators
+        response.headers.setdefault("ETag", etag)
+        if last_modified:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        # per-user pages: browsers may keep them but must revalidate each time
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET/HEAD with 304 Not Modified when get_validators() matches the
+    request's If-None-Match/If-Modified-Since. Goes after the login mixin.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        validators = self.get_validators(request, *args, **kwargs)
+        response = not_modified(request, validators) or super().dispatch(request, *args, **kwargs)
+        return add_validators(response, validators)
+
+
+class AsyncConditionalGetMixin:
+    """ConditionalGetMixin for async views; get_validators() is a coroutine."""
+
+    async def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await super().dispatch(request, *args, **kwargs)
+        validators = await self.get_validators(request, *args, **kwargs)
+        response = not_modified(request, validators) or await super().dispatch(request, *args, **kwargs)
+        return add_validators(response, validators)
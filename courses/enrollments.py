@@ -0,0 +1,98 @@
+# courses/enrollments.py
+"""
+Cohort enrollment: every listed student into every listed course at once.
+
+bulk_enroll() inserts the cross product in batches with
+bulk_create(ignore_conflicts=True), so pairs that already exist are skipped
+by the (student, course) unique constraint instead of being looked up
+first. The pairs are generated a batch at a time, so memory does not grow
+with the cohort, and the product is capped at BULK_ENROLL_MAX_PAIRS.
+bulk_create skips the model signals, so the enrollment counter and the
+grade statistics are maintained here.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import StatCounter
+from .analytics import mark_grade_stats_changed
+from .models import Course, Enrollment
+
+User = get_user_model()
+
+
+class CohortTooLarge(ValueError):
+    """More student/course pairs than settings.BULK_ENROLL_MAX_PAIRS allows."""
+
+
+def check_cohort_size(student_ids, course_ids):
+    """Raise CohortTooLarge if the students x courses product is over the cap."""
+    limit = settings.BULK_ENROLL_MAX_PAIRS
+    if len(set(student_ids)) * len(set(course_ids)) > limit:
+        raise CohortTooLarge(f"At most {limit} student/course pairs per request.")
+
+
+def _existing_ids(queryset, ids):
+    """The subset of `ids` present in `queryset`, looked up in IN-list sized chunks."""
+    ids = sorted(set(ids))
+    size = connection.features.max_query_params or len(ids) or 1
+    found = set()
+    for start in range(0, len(ids), size):
+        found.update(queryset.filter(pk__in=ids[start:start + size]).values_list("pk", flat=True))
+    return found
+
+
+def split_cohort(student_ids, course_ids):
+    """
+    ((students, courses), (missing students, missing courses)): the ids that
+    exist (students must have is_student set) and those that do not.
+    """
+    students = _existing_ids(User.objects.filter(is_student=True), student_ids)
+    courses = _existing_ids(Course.objects.all(), course_ids)
+    missing = (sorted(set(student_ids) - students), sorted(set(course_ids) - courses))
+    return (sorted(students), sorted(courses)), missing
+
+
+def _count_enrollments(student_ids, course_ids):
+    """Enrollments among the given students and courses, counted in IN-list sized chunks."""
+    size = max((connection.features.max_query_params or 2000) // 2, 1)
+    return sum(
+        Enrollment.objects.filter(
+            student_id__in=student_ids[s:s + size], course_id__in=course_ids[c:c + size],
+        ).count()
+        for c in range(0, len(course_ids), size) for s in range(0, len(student_ids), size)
+    )
+
+
+def bulk_enroll(student_ids, course_ids):
+    """
+    Enroll each student in each course in one transaction. The ids must
+    exist (see split_cohort). Returns {"requested", "created", "skipped"};
+    raises CohortTooLarge past BULK_ENROLL_MAX_PAIRS.
+    """
+    student_ids, course_ids = sorted(set(student_ids)), sorted(set(course_ids))
+    check_cohort_size(student_ids, course_ids)
+    requested = len(student_ids) * len(course_ids)
+    if not requested:
+        return {"requested": 0, "created": 0, "skipped": 0}
+
+    enrolled_on = timezone.now()
+    batch_size = settings.BULK_ENROLL_BATCH_SIZE
+    pairs = ((s, c) for c in course_ids for s in student_ids)
+    with transaction.atomic():
+        before = _count_enrollments(student_ids, course_ids)
+        while batch := list(islice(pairs, batch_size)):
+            Enrollment.objects.bulk_create(
+                [Enrollment(student_id=s, course_id=c, enrolled_on=enrolled_on) for s, c in batch],
+                batch_size=batch_size, ignore_conflicts=True,
+            )
+        # ignore_conflicts does not report which rows went in, so count the
+        # requested pairs again
+        created = _count_enrollments(student_ids, course_ids) - before
+        if created:
+            StatCounter.bump(StatCounter.ENROLLMENTS, created)
+            mark_grade_stats_changed(course_ids)
+    return {"requested": requested, "created": created, "skipped": requested - created}
@@ -0,0 +1,174 @@
+# courses/favorites.py
+"""
+Per-user cache of favorite course ids.
+
+Browse pages only need to know *which* courses a student has favorited, so
+the set is cached as a sorted array of 64-bit ints under one key per user.
+The signal receivers below drop the entry whenever the underlying rows
+change, so a cached set is never stale for longer than a single write.
+"""
+from array import array
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.constants import OnConflict
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import StatCounter
+from .models import Course, Favorite
+from .recommendations import mark_neighbors_changed
+
+User = get_user_model()
+
+# rows per multi-row INSERT, well under every backend's parameter limit
+INSERT_CHUNK_SIZE = 300
+
+
+def _cache_key(user_id):
+    return f"favorite_ids:v1:{user_id}"
+
+
+def encode_ids(ids):
+    return array("q", sorted(ids)).tobytes()
+
+
+def decode_ids(blob):
+    ids = array("q")
+    ids.frombytes(blob)
+    return set(ids)
+
+
+def get_favorite_ids(user):
+    """
+    Return the set of course ids `user` has favorited, from cache when possible.
+    """
+    if not user.is_authenticated:
+        return set()
+
+    key = _cache_key(user.pk)
+    blob = cache.get(key)
+    if blob is not None:
+        return decode_ids(blob)
+
+    ids = set(Favorite.objects.filter(user_id=user.pk).values_list("course_id", flat=True))
+    cache.set(key, encode_ids(ids), settings.FAVORITE_IDS_CACHE_SECONDS)
+    return ids
+
+
+async def aget_favorite_ids(user):
+    """Async get_favorite_ids(); shares its cache entries."""
+    if not user.is_authenticated:
+        return set()
+
+    key = _cache_key(user.pk)
+    blob = await cache.aget(key)
+    if blob is not None:
+        return decode_ids(blob)
+
+    ids = {course_id async for course_id in Favorite.objects.filter(user_id=user.pk).values_list("course_id", flat=True)}
+    await cache.aset(key, encode_ids(ids), settings.FAVORITE_IDS_CACHE_SECONDS)
+    return ids
+
+
+def invalidate_favorite_ids(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def _insert_favorites(user_id, course_ids):
+    """INSERT ... ON CONFLICT DO NOTHING; returns how many rows were new."""
+    ops = connection.ops
+    table = ops.quote_name(Favorite._meta.db_table)
+    columns = ", ".join(ops.quote_name(c) for c in ("user_id", "course_id", "created_at"))
+    created_at = Favorite._meta.get_field("created_at").get_db_prep_value(timezone.now(), connection)
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(course_ids), INSERT_CHUNK_SIZE):
+            chunk = course_ids[start:start + INSERT_CHUNK_SIZE]
+            sql = (
+                f"{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {table} ({columns}) VALUES "
+                f"{', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"{ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)}"
+            )
+            cursor.execute(sql, [value for course_id in chunk for value in (user_id, course_id, created_at)])
+            inserted += cursor.rowcount
+    return inserted
+
+
+def set_favorite(user, course_id, favorite):
+    """
+    Idempotently make `user` (un)favorite `course_id` with one statement:
+    INSERT ... ON CONFLICT DO NOTHING to add, DELETE to remove. Returns True
+    when a row was actually written. This bypasses the model signals, so the
+    stats counter and the cached id set are maintained here.
+    """
+    if favorite:
+        changed = _insert_favorites(user.pk, [course_id]) == 1
+    else:
+        deleted, _ = Favorite.objects.filter(user_id=user.pk, course_id=course_id).delete()
+        changed = deleted > 0
+
+    if changed:
+        StatCounter.bump(StatCounter.FAVORITES, 1 if favorite else -1)
+        invalidate_favorite_ids(user.pk)
+        mark_neighbors_changed([course_id])
+    return changed
+
+
+def set_favorites(user, changes):
+    """
+    Apply {course_id: favorite} for `user` with a fixed number of statements
+    however many courses are given. Returns {course_id: changed}; call it
+    inside a transaction so the flags match what was written.
+    """
+    if not changes:
+        return {}
+    before = set(
+        Favorite.objects.filter(user_id=user.pk, course_id__in=list(changes)).values_list("course_id", flat=True)
+    )
+    added = _insert_favorites(user.pk, [c for c, favorite in changes.items() if favorite])
+    removed = 0
+    to_remove = [c for c, favorite in changes.items() if not favorite]
+    if to_remove:
+        removed, _ = Favorite.objects.filter(user_id=user.pk, course_id__in=to_remove).delete()
+
+    changed = {course_id: favorite != (course_id in before) for course_id, favorite in changes.items()}
+    if added or removed:
+        StatCounter.bump(StatCounter.FAVORITES, added - removed)
+        invalidate_favorite_ids(user.pk)
+        mark_neighbors_changed([course_id for course_id, flag in changed.items() if flag])
+    return changed
+
+
+def delete_favorites(queryset):
+    """
+    Delete the Favorite rows in `queryset` (e.g. from the admin) and keep the
+    counter and caches in step; Favorite has no delete receivers.
+    """
+    pairs = set(queryset.values_list("user_id", "course_id"))
+    deleted, _ = queryset.delete()
+    StatCounter.bump(StatCounter.FAVORITES, -deleted)
+    invalidate_favorite_ids(*{user_id for user_id, _ in pairs})
+    mark_neighbors_changed(course_id for _, course_id in pairs)
+    return deleted
+
+
+# Signals: drop cached sets whenever favorites change
+@receiver(post_save, sender=Favorite)
+def invalidate_on_favorite_save(sender, instance, **kwargs):
+    invalidate_favorite_ids(instance.user_id)
+    mark_neighbors_changed([instance.course_id])
+
+
+@receiver(pre_delete, sender=User)
+def invalidate_on_user_delete(sender, instance, **kwargs):
+    invalidate_favorite_ids(instance.pk)
+    mark_neighbors_changed(Favorite.objects.filter(user_id=instance.pk).values_list("course_id", flat=True))
+
+
+@receiver(pre_delete, sender=Course)
+def invalidate_on_course_delete(sender, instance, **kwargs):
+    invalidate_favorite_ids(*Favorite.objects.filter(course_id=instance.pk).values_list("user_id", flat=True))
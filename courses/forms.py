@@ -10,3 +10,36 @@ class CourseForm(forms.ModelForm):
             "title": forms.TextInput(attrs={"class": "form-control"}),
             "description": forms.Textarea(attrs={"class": "form-control", "rows": 4}),
         }
+
+
+class EnrollmentFilterForm(forms.Form):
+    """Filters shared by the enrollment list, its export and export_enrollments."""
+    course = forms.IntegerField(required=False, min_value=1,
+                                widget=forms.NumberInput(attrs={"class": "form-control form-control-sm", "placeholder": "Course id"}))
+    enrolled_from = forms.DateField(required=False,
+                                    widget=forms.DateInput(attrs={"class": "form-control form-control-sm", "type": "date"}))
+    enrolled_to = forms.DateField(required=False,
+                                  widget=forms.DateInput(attrs={"class": "form-control form-control-sm", "type": "date"}))
+    grade = forms.CharField(required=False, max_length=10,
+                            widget=forms.TextInput(attrs={"class": "form-control form-control-sm", "placeholder": "Grade"}))
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get("enrolled_from"), cleaned.get("enrolled_to")
+        if start and end and start > end:
+            raise forms.ValidationError("The start date must be before the end date.")
+        return cleaned
+
+
+class CohortEnrollmentForm(forms.Form):
+    """Courses picked in the "Enroll selected students" admin action."""
+    courses = forms.ModelMultipleChoiceField(queryset=Course.objects.only("id", "title").order_by("title"),
+                                             widget=forms.SelectMultiple(attrs={"size": 15}))
+
+
+class GradeUploadForm(forms.Form):
+    """The CSV on the enrollment admin's "Upload grades" page."""
+    file = forms.FileField(help_text="CSV with student_email, course_id and grade columns; "
+                                     "an empty grade clears it.")
+    dry_run = forms.BooleanField(required=False, initial=True,
+                                 help_text="Only show what would change.")
@@ -0,0 +1,47 @@
+# courses/fragments.py
+"""
+Eviction for the cached course card fragment in includes/course_card.html.
+
+The fragment key already contains Course.updated_at, so an edited course is
+never served stale; these receivers drop the superseded entry so it does not
+linger in the cache until it expires.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Course
+
+FRAGMENT_NAME = "course_card"
+
+
+def course_card_key(course_id, updated_at):
+    # must match `{% cache ... course_card course.id course.updated_at.isoformat %}`
+    return make_template_fragment_key(FRAGMENT_NAME, [course_id, updated_at.isoformat()])
+
+
+def evict_course_card(course_id, updated_at):
+    if course_id is not None and updated_at is not None:
+        cache.delete(course_card_key(course_id, updated_at))
+
+
+# Signals: remember the version a Course was loaded at, evict it on change
+@receiver(post_init, sender=Course)
+def remember_card_version(sender, instance, **kwargs):
+    if "updated_at" in instance.get_deferred_fields():
+        instance._card_updated_at = None
+    else:
+        instance._card_updated_at = instance.updated_at
+
+
+@receiver(post_save, sender=Course)
+def evict_card_on_save(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        evict_course_card(instance.pk, instance._card_updated_at)
+    instance._card_updated_at = instance.updated_at
+
+
+@receiver(post_delete, sender=Course)
+def evict_card_on_delete(sender, instance, **kwargs):
+    evict_course_card(instance.pk, instance._card_updated_at)
@@ -0,0 +1,188 @@
+# courses/grades.py
+"""
+Grade uploads: a CSV of (student email, course id, grade) applied to
+Enrollment.grade.
+
+The file is read as a stream and handled CHUNK_SIZE rows at a time: one
+query resolves the chunk's emails (on the lower(email) index), one fetches
+the matching enrollments, and the grades that actually change are written
+with one UPDATE ... WHERE id IN (...) per distinct grade. Only the running
+counts, a capped sample of problems and the ids of touched courses outlive
+a chunk, so memory does not grow with the file. Queryset updates skip the
+model signals, so the grade statistics are flagged here.
+
+The header names the columns, in any order; an export_enrollments CSV
+(student_email, course_id, grade) can be uploaded as it is.
+"""
+import csv
+import io
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .analytics import GRADE_POINTS, mark_grade_stats_changed
+from .models import Enrollment
+
+User = get_user_model()
+
+CHUNK_SIZE = 2000
+# problems kept for the report; the rest are only counted
+MAX_ERRORS = 100
+COLUMNS = {
+    "email": ("student_email", "email"),
+    "course": ("course_id", "course"),
+    "grade": ("grade",),
+}
+
+
+class GradeFileError(ValueError):
+    """The file cannot be read as a grade upload at all (e.g. a missing column)."""
+
+
+def normalize_grade(value):
+    """The stored form of an uploaded grade: None to clear it; ValueError if unknown."""
+    value = value.strip().upper()
+    if not value:
+        return None
+    if value not in GRADE_POINTS:
+        raise ValueError(f"unknown grade {value!r}")
+    return value
+
+
+def read_rows(stream):
+    """
+    Yield (line number, email, course id, grade) for each row of the CSV
+    text `stream`; unusable rows come out with the problem in place of the
+    grade as a ValueError.
+    """
+    reader = csv.reader(stream)
+    header = [name.strip().lower() for name in next(reader, [])]
+    positions = {}
+    for column, names in COLUMNS.items():
+        found = [header.index(name) for name in names if name in header]
+        if not found:
+            raise GradeFileError(f"The header has no {' or '.join(names)} column.")
+        positions[column] = found[0]
+    width = max(positions.values()) + 1
+
+    for row in reader:
+        if not any(field.strip() for field in row):
+            continue
+        line = reader.line_num
+        if len(row) < width:
+            yield line, None, None, ValueError("missing columns")
+            continue
+        email = row[positions["email"]].strip()
+        try:
+            course_id = int(row[positions["course"]])
+        except ValueError:
+            yield line, email, None, ValueError(f"bad course id {row[positions['course']]!r}")
+            continue
+        try:
+            grade = normalize_grade(row[positions["grade"]])
+        except ValueError as exc:
+            grade = exc
+        yield line, email, course_id, grade
+
+
+def open_upload(uploaded_file):
+    """A text stream over an uploaded file, decoded as it is read."""
+    return io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+
+
+class GradeImport:
+    """
+    Running totals of one upload. `on_change(email, course_id, old, new)` is
+    called for every grade that changes (or would, with dry_run).
+    """
+
+    def __init__(self, dry_run=False, chunk_size=CHUNK_SIZE, on_change=None):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.on_change = on_change
+        self.rows = self.updated = self.unchanged = self.failed = 0
+        self.errors = []
+        self.course_ids = set()
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def summary(self):
+        return {
+            "rows": self.rows, "updated": self.updated, "unchanged": self.unchanged,
+            "failed": self.failed, "errors": self.errors, "dry_run": self.dry_run,
+        }
+
+    def apply_chunk(self, chunk):
+        emails = {email.lower() for _, email, _, grade in chunk if not isinstance(grade, ValueError)}
+        students = dict(
+            User.objects.alias(email_lower=Lower("email")).filter(email_lower__in=emails)
+            .annotate(key=Lower("email")).values_list("key", "id")
+        )
+        wanted, resolved = {}, 0
+        for line, email, course_id, grade in chunk:
+            if isinstance(grade, ValueError):
+                self.error(line, str(grade))
+            elif email.lower() not in students:
+                self.error(line, f"no user with email {email!r}")
+            else:
+                # a later row for the same enrollment wins
+                wanted[students[email.lower()], course_id] = (line, email, grade)
+                resolved += 1
+        # the rows it overrode count as unchanged
+        self.unchanged += resolved - len(wanted)
+
+        # tuples, not instances: building models would dominate the run
+        enrollments = {
+            (student_id, course_id): (pk, old) for student_id, course_id, pk, old in
+            Enrollment.objects.filter(student_id__in={s for s, _ in wanted}, course_id__in={c for _, c in wanted})
+            .values_list("student_id", "course_id", "id", "grade")
+        }
+        changed = defaultdict(list)  # new grade: enrollment ids
+        for (student_id, course_id), (line, email, grade) in wanted.items():
+            if (student_id, course_id) not in enrollments:
+                self.error(line, f"{email} is not enrolled in course {course_id}")
+                continue
+            pk, old = enrollments[student_id, course_id]
+            if old == grade:
+                self.unchanged += 1
+                continue
+            if self.on_change:
+                self.on_change(email, course_id, old, grade)
+            changed[grade].append(pk)
+            self.updated += 1
+            self.course_ids.add(course_id)
+        if not self.dry_run:
+            # one UPDATE per distinct grade; bulk_update's CASE WHEN per row
+            # spends ten times as long building the statement
+            for grade, ids in changed.items():
+                Enrollment.objects.filter(id__in=ids).update(grade=grade)
+
+    def run(self, rows):
+        chunk = []
+        with transaction.atomic():
+            for row in rows:
+                self.rows += 1
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self.apply_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.apply_chunk(chunk)
+            if self.course_ids and not self.dry_run:
+                mark_grade_stats_changed(self.course_ids)
+        return self.summary()
+
+
+def import_grades(stream, dry_run=False, chunk_size=CHUNK_SIZE, on_change=None):
+    """
+    Apply the grades in the CSV text `stream` in one transaction (nothing is
+    written with dry_run). Rows that cannot be applied are skipped and
+    reported. Returns {"rows", "updated", "unchanged", "failed", "errors",
+    "dry_run"}, with at most MAX_ERRORS (line, message) pairs in "errors".
+    """
+    return GradeImport(dry_run, chunk_size, on_change).run(read_rows(stream))
@@ -0,0 +1,166 @@
+# courses/images.py
+"""
+Resized and WebP variants for course images and student avatars.
+
+Each upload gets a set of downscaled copies (one JPEG/PNG and one WebP per
+width) stored next to the original under `variants/`. The work runs on a
+small thread pool after the upload's transaction commits, and the result is
+recorded as a manifest on the model (`image_variants` / `avatar_variants`):
+
+    {"source": "course_images/a.jpg", "widths": [320, 640], "fallback": "jpg"}
+
+Templates only use a manifest whose `source` still matches the current file,
+so a replaced image falls back to the original until its variants exist.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from accounts.models import StudentProfile
+from .fragments import evict_course_card
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+COURSE_IMAGE_WIDTHS = (320, 640, 960)
+AVATAR_WIDTHS = (48, 96, 192)
+
+# model -> (file field, manifest field, widths)
+TARGETS = {
+    Course: ("image", "image_variants", COURSE_IMAGE_WIDTHS),
+    StudentProfile: ("avatar", "avatar_variants", AVATAR_WIDTHS),
+}
+
+_executor = None
+
+
+def variant_name(source_name, width, ext):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}-{width}w.{ext}")
+
+
+def has_variants(field_file, manifest):
+    return bool(field_file and manifest and manifest.get("source") == field_file.name)
+
+
+def generate_variants(field_file, widths, storage=default_storage):
+    """
+    Write the resized copies of `field_file` and return their manifest.
+    Widths larger than the original are skipped (but the smallest is kept).
+    """
+    with field_file.open("rb") as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        image.load()
+
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    fallback = "png" if has_alpha else "jpg"
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    made = []
+    for width in sorted(widths):
+        if made and width > image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width < image.width else image
+        for ext, save_args in (
+            ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+            (fallback, {"format": "PNG", "optimize": True} if has_alpha
+             else {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+        ):
+            buffer = BytesIO()
+            resized.save(buffer, **save_args)
+            name = variant_name(field_file.name, width, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+        made.append(width)
+
+    return {"source": field_file.name, "widths": made, "fallback": fallback}
+
+
+def build_variants_for(model, pk):
+    """
+    Generate and record the variants for one row; safe to run in a worker.
+    Returns the manifest, or None if the row or its file went away first.
+    """
+    file_field, manifest_field, widths = TARGETS[model]
+    instance = model.objects.filter(pk=pk).first()
+    field_file = getattr(instance, file_field, None) if instance else None
+    if not field_file:
+        return None
+
+    manifest = generate_variants(field_file, widths)
+    updates = {manifest_field: manifest}
+    if model is Course:
+        # rendered course cards are cached per updated_at
+        updates["updated_at"] = timezone.now()
+    # only record the manifest if the file was not replaced meanwhile
+    if not model.objects.filter(pk=pk, **{file_field: field_file.name}).update(**updates):
+        return None
+    if model is Course:
+        evict_course_card(pk, instance.updated_at)
+    return manifest
+
+
+def _run_job(model, pk):
+    close_old_connections()
+    try:
+        build_variants_for(model, pk)
+    except Exception:
+        logger.exception("Could not build image variants for %s %s", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix="image-variants"
+        )
+    return _executor
+
+
+def schedule_variants(model, pk):
+    """Queue variant generation for after the current transaction commits."""
+    if settings.IMAGE_VARIANTS_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(_run_job, model, pk))
+    else:
+        transaction.on_commit(lambda: build_variants_for(model, pk))
+
+
+def srcset(field_file, manifest, ext):
+    return ", ".join(
+        f"{default_storage.url(variant_name(field_file.name, width, ext))} {width}w"
+        for width in manifest["widths"]
+    )
+
+
+def variant_url(field_file, manifest, min_width):
+    """URL of the smallest fallback-format variant at least `min_width` wide."""
+    if not has_variants(field_file, manifest):
+        return field_file.url
+    widths = manifest["widths"]
+    width = next((w for w in widths if w >= min_width), widths[-1])
+    return default_storage.url(variant_name(field_file.name, width, manifest["fallback"]))
+
+
+# Signals: queue variants whenever an image or avatar changes
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=StudentProfile)
+def queue_variants_on_save(sender, instance, raw=False, **kwargs):
+    file_field, manifest_field, _ = TARGETS[sender]
+    field_file = getattr(instance, file_field)
+    if not raw and field_file and not has_variants(field_file, getattr(instance, manifest_field)):
+        schedule_variants(sender, instance.pk)
@@ -0,0 +1,149 @@
+# courses/management/commands/bench_concurrency.py
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarking import async_views, summarize
+from courses.models import Course
+
+User = get_user_model()
+
+
+def call_wsgi(app, path, cookie):
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "", "SCRIPT_NAME": "",
+        "SERVER_NAME": "testserver", "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver", "HTTP_COOKIE": cookie,
+        "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.input": BytesIO(), "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True, "wsgi.multiprocess": False, "wsgi.run_once": False,
+    }
+    status = []
+    body = app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        b"".join(body)
+    finally:
+        body.close()
+    return status[0]
+
+
+async def call_asgi(app, path, cookie):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    requested = False
+    status = []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the read-heavy pages with N concurrent in-process connections, once "
+        "through the sync views on WSGIHandler with a fixed worker-thread pool and "
+        "once through the async views on ASGIHandler, and compare latency and "
+        "throughput. Seed data first with seed_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=5000, help="Total requests per server.")
+        parser.add_argument("--threads", type=int, default=16,
+                            help="WSGI worker threads, like gunicorn --threads.")
+        parser.add_argument("--students", type=int, default=50)
+
+    def handle(self, *args, **options):
+        course_ids = list(Course.objects.order_by("-created_at").values_list("id", flat=True)[:50])
+        students = list(User.objects.filter(is_student=True).order_by("id")[:options["students"]])
+        if not course_ids or not students:
+            raise CommandError("No courses or students; run seed_bench first.")
+
+        paths = [reverse("accounts:landing"), reverse("accounts:dashboard"), reverse("courses:course_list"),
+                 reverse("courses:my_courses")] + [reverse("courses:course_detail", args=[pk]) for pk in course_ids[:4]]
+        self.total = options["requests"]
+        self.connections = options["connections"]
+
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            cookies = []
+            for student in students:
+                client = Client()
+                client.force_login(student)
+                cookies.append(f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}")
+            self.jobs = [(paths[i % len(paths)], cookies[i % len(cookies)]) for i in range(self.total)]
+            try:
+                with async_views(False):
+                    wsgi = asyncio.run(self.run_wsgi(WSGIHandler(), options["threads"]))
+                with async_views(True):
+                    asgi = asyncio.run(self.run_asgi(ASGIHandler()))
+            finally:
+                engine = import_module(settings.SESSION_ENGINE)
+                for cookie in cookies:
+                    engine.SessionStore(cookie.split("=", 1)[1]).delete()
+
+        self.stdout.write(f"{self.total} requests over {self.connections} connections, {len(paths)} pages")
+        self.stdout.write(f"{'server':<22} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for label, (elapsed, samples, errors) in (
+            (f"wsgi sync ({options['threads']} threads)", wsgi), ("asgi async", asgi),
+        ):
+            stats = summarize(samples)
+            self.stdout.write(
+                f"{label:<22} {len(samples) / elapsed:>8.1f} {stats['p50_ms']:>9.2f} "
+                f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {errors:>7}"
+            )
+
+    async def drive(self, call):
+        """
+        Keep `connections` requests in flight, each connection sending its
+        next request as soon as the previous one is answered.
+        """
+        for path, cookie in self.jobs[:len(self.jobs) // 10]:
+            await call(path, cookie)  # warm-up, so both servers start with warm caches
+        jobs = iter(self.jobs)
+        samples, errors = [], 0
+
+        async def connection():
+            nonlocal errors
+            for path, cookie in jobs:
+                started = time.perf_counter()
+                status = await call(path, cookie)
+                samples.append(time.perf_counter() - started)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(self.connections)))
+        return time.perf_counter() - started, samples, errors
+
+    async def run_wsgi(self, app, threads):
+        # requests queue for a fixed pool of worker threads, as in a threaded WSGI server
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(threads) as workers:
+            return await self.drive(lambda path, cookie: loop.run_in_executor(workers, call_wsgi, app, path, cookie))
+
+    async def run_asgi(self, app):
+        return await self.drive(lambda path, cookie: call_asgi(app, path, cookie))
@@ -0,0 +1,64 @@
+# courses/management/commands/bench_course_cards.py
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from core.benchmarking import rolled_back, summarize, time_calls
+from courses.favorites import get_favorite_ids
+from courses.models import Course
+
+User = get_user_model()
+
+CARDS = engines["django"].from_string(
+    '{% for course in courses %}{% include "includes/course_card.html" %}{% endfor %}'
+)
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering N course cards with the fragment cache disabled, "
+        "cold and warm. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        n, repeat = options["cards"], options["repeat"]
+
+        with rolled_back():
+            user = User.objects.create_user("bench-cards@example.com", "Bench", "bench-pass-123")
+            Course.objects.bulk_create(
+                (Course(title=f"Card course {i}", description="Lorem ipsum dolor sit amet " * 60)
+                 for i in range(n)),
+                batch_size=2000,
+            )
+            courses = list(Course.objects.order_by("-id")[:n])
+            request = RequestFactory().get("/courses/")
+            request.user = user
+            context = {"courses": courses, "favorite_ids": get_favorite_ids(user)}
+
+            def render():
+                CARDS.render(context, request)
+
+            def render_cold():
+                cache.clear()
+                render()
+
+            results = []
+            with override_settings(CACHES=NO_CACHE):
+                results.append(("no cache", summarize(time_calls(render, repeat))))
+            results.append(("cold", summarize(time_calls(render_cold, repeat))))
+            render()
+            results.append(("warm", summarize(time_calls(render, repeat))))
+            cache.clear()
+
+        self.stdout.write(f"{n} cards, {repeat} renders each")
+        self.stdout.write(f"{'mode':>10} {'p50 ms':>9} {'p95 ms':>9}")
+        for label, stats in results:
+            self.stdout.write(f"{label:>10} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}")
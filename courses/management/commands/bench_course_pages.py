@@ -0,0 +1,54 @@
+# courses/management/commands/bench_course_pages.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.benchmarking import bench_client, rolled_back, summarize, time_calls
+from courses.models import Course
+from courses.pagination import KeysetPaginator
+from courses.views import CourseListView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the first and the deepest page of the course list at growing "
+        "catalog sizes. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,50000",
+                            help="Comma separated catalog sizes to measure.")
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options["sizes"].split(","))
+        url = reverse("courses:course_list")
+
+        with rolled_back():
+            user = User.objects.create_user("bench-pages@example.com", "Bench", "bench-pass-123")
+            existing = Course.objects.count()
+            self.stdout.write(f"{'courses':>10} {'page':>6} {'p50 ms':>9} {'p95 ms':>9}")
+
+            for size in sizes:
+                missing = size - existing
+                if missing > 0:
+                    Course.objects.bulk_create(
+                        (Course(title=f"Bench course {existing + i}", description="Benchmark course " * 20)
+                         for i in range(missing)),
+                        batch_size=2000,
+                    )
+                    existing = size
+
+                # cursor pointing just above the oldest page of the catalog
+                paginator = KeysetPaginator(Course.objects.all(), CourseListView.paginate_by)
+                boundary = Course.objects.order_by("created_at", "id")[CourseListView.paginate_by]
+                deep_cursor = paginator.encode_cursor(boundary, "n")
+
+                with bench_client(user) as client:
+                    for label, params in (("first", {}), ("last", {"cursor": deep_cursor})):
+                        stats = summarize(time_calls(lambda: client.get(url, params), options["repeat"]))
+                        self.stdout.write(
+                            f"{existing:>10} {label:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}"
+                        )
@@ -0,0 +1,63 @@
+# courses/management/commands/bench_search.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarking import make_vocabulary, rolled_back, summarize
+from courses.models import Course
+from courses.search import index_courses, search_courses
+
+STOP_WORDS = "the of and to in for with on an a is by".split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic course corpus and time ranked search queries against it. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        total, batch_size = options["courses"], options["batch_size"]
+
+        words, cum_weights = make_vocabulary(rng, options["vocabulary"])
+
+        def text(k):
+            content = rng.choices(words, cum_weights=cum_weights, k=k)
+            return " ".join(w if rng.random() > 0.3 else f"{rng.choice(STOP_WORDS)} {w}" for w in content)
+
+        with rolled_back():
+            start = time.perf_counter()
+            for offset in range(0, total, batch_size):
+                batch = Course.objects.bulk_create([
+                    Course(
+                        title=text(3).title(),
+                        description=text(40),
+                    )
+                    for _ in range(min(batch_size, total - offset))
+                ])
+                index_courses(batch)
+            self.stdout.write(f"Seeded and indexed {total} courses in {time.perf_counter() - start:.1f}s")
+
+            queries = [text(rng.choice((1, 2, 3))) for _ in range(options["queries"])]
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                search_courses(query, page=rng.choice((1, 1, 1, 2, 5)))
+                samples.append(time.perf_counter() - start)
+
+        stats = summarize(samples)
+        self.stdout.write(
+            f"{stats['n']} queries: p50 {stats['p50_ms']:.2f} ms, "
+            f"p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms"
+        )
+        style = self.style.SUCCESS if stats["p95_ms"] < 50 else self.style.WARNING
+        self.stdout.write(style(f"p95 target 50 ms: {'met' if stats['p95_ms'] < 50 else 'missed'}"))
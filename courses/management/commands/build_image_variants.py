@@ -0,0 +1,54 @@
+# courses/management/commands/build_image_variants.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from courses.images import TARGETS, build_variants_for, has_variants
+
+
+def _build(model, pk):
+    try:
+        return build_variants_for(model, pk)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Backfill resized/WebP variants for existing course images and avatars."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild variants even where an up-to-date manifest exists.")
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, (file_field, manifest_field, _) in TARGETS.items():
+            rows = (
+                model.objects.exclude(**{file_field: ""}).exclude(**{f"{file_field}__isnull": True})
+                .only("pk", file_field, manifest_field)
+            )
+            for obj in rows.iterator(chunk_size=2000):
+                if options["force"] or not has_variants(getattr(obj, file_field), getattr(obj, manifest_field)):
+                    jobs.append((model, obj.pk))
+
+        self.stdout.write(f"Building variants for {len(jobs)} images with {options['workers']} workers...")
+        built = vanished = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(_build, model, pk): (model, pk) for model, pk in jobs}
+            for future in as_completed(futures):
+                model, pk = futures[future]
+                try:
+                    manifest = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {pk}: {exc}")
+                    continue
+                # None: the row was deleted or its image removed or replaced meanwhile
+                if manifest is None:
+                    vanished += 1
+                else:
+                    built += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built}, vanished {vanished}, failed {failed}."))
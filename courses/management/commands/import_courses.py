@@ -0,0 +1,156 @@
+# courses/management/commands/import_courses.py
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import StatCounter
+from courses.forms import CourseForm
+from courses.images import schedule_variants
+from courses.models import Course
+from courses.search import index_courses
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream courses from a CSV or JSONL file (title, description and an "
+        "optional image file name) and insert them in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV/JSONL file to import, or - for stdin.")
+        parser.add_argument("--format", choices=("csv", "jsonl"),
+                            help="Input format; guessed from the file extension by default.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows per bulk_create/transaction (default 1000).")
+        parser.add_argument("--images-dir",
+                            help="Directory holding the files named in the 'image' column.")
+        parser.add_argument("--rejects",
+                            help="Write rejected rows with their errors to this CSV file.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate only, do not write anything.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        images_dir = Path(options["images_dir"]) if options["images_dir"] else None
+        if images_dir and not images_dir.is_dir():
+            raise CommandError(f"Images directory not found: {images_dir}")
+        batch_size = max(1, options["batch_size"])
+
+        self.inserted = self.rejected = 0
+        self.started = time.perf_counter()
+        handle = sys.stdin if path == "-" else self._open(path)
+        rejects_file = rejects = None
+
+        try:
+            if options["rejects"]:
+                rejects_file = self._open(options["rejects"], "w")
+                rejects = csv.writer(rejects_file)
+                rejects.writerow(["line", "errors", "row"])
+            batch = []
+            for line_no, row in self._rows(handle, fmt):
+                course, image_path, errors = self._build(row, images_dir)
+                if errors:
+                    self.rejected += 1
+                    if rejects:
+                        rejects.writerow([line_no, json.dumps(errors), json.dumps(row, default=str)])
+                    continue
+                batch.append((course, image_path))
+                if len(batch) >= batch_size:
+                    self._flush(batch, options["dry_run"])
+                    batch = []
+            self._flush(batch, options["dry_run"])
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            if rejects_file:
+                rejects_file.close()
+
+        elapsed = time.perf_counter() - self.started
+        total = self.inserted + self.rejected
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.inserted} courses, rejected {self.rejected} rows "
+            f"in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/sec)."
+        ))
+
+    def _open(self, path, mode="r"):
+        try:
+            return open(path, mode, newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc}")
+
+    def _rows(self, handle, fmt):
+        """Yield (line number, dict) pairs without reading the whole file."""
+        if fmt == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {"__error__": f"Invalid JSON: {exc}"}
+            yield line_no, row if isinstance(row, dict) else {"__error__": "Expected a JSON object."}
+
+    def _build(self, row, images_dir):
+        """
+        Validate one row with CourseForm, image included; return (unsaved
+        Course, image path or None, errors). The image is stored by _flush.
+        """
+        if "__error__" in row:
+            return None, None, {"__all__": [row["__error__"]]}
+
+        data = {"title": row.get("title"), "description": row.get("description")}
+        image_name = (row.get("image") or "").strip()
+        if not (image_name and images_dir):
+            form = CourseForm(data=data)
+            return (form.save(commit=False), None, None) if form.is_valid() else (None, None, form.errors.get_json_data())
+
+        image_path = images_dir / image_name
+        if not image_path.is_file():
+            return None, None, {"image": [f"File not found: {image_name}"]}
+        with image_path.open("rb") as fh:
+            form = CourseForm(data=data, files={"image": File(fh, name=image_path.name)})
+            if not form.is_valid():
+                return None, None, form.errors.get_json_data()
+        course = form.save(commit=False)
+        course.image = None  # the handle is closed; _flush stores the file
+        return course, image_path, None
+
+    def _flush(self, batch, dry_run):
+        if not batch:
+            return
+        if not dry_run:
+            with transaction.atomic():
+                created = Course.objects.bulk_create([course for course, _ in batch])
+                # bulk_create skips post_save, so do what the receivers would
+                index_courses(created)
+                StatCounter.bump(StatCounter.COURSES, len(created))
+            # files go to storage only once their rows are committed, so a
+            # failed batch leaves none behind
+            with_images = []
+            for course, image_path in batch:
+                if image_path:
+                    with image_path.open("rb") as fh:
+                        course.image.save(image_path.name, File(fh), save=False)
+                    with_images.append(course)
+            Course.objects.bulk_update(with_images, ["image"])
+            for course in with_images:
+                schedule_variants(Course, course.pk)
+        self.inserted += len(batch)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f"  {self.inserted:,} ok, {self.rejected:,} rejected "
+            f"({(self.inserted + self.rejected) / elapsed:,.0f} rows/sec)"
+        )
@@ -0,0 +1,51 @@
+# courses/management/commands/import_grades.py
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.grades import CHUNK_SIZE, GradeFileError, import_grades
+
+
+class Command(BaseCommand):
+    help = (
+        "Set enrollment grades from a CSV with student_email, course_id and grade "
+        "columns. With --dry-run nothing is saved and the changes are printed as CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to read, or - for stdin.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Print student_email,course_id,old_grade,new_grade for each change instead of saving.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        on_change = None
+        if options["dry_run"]:
+            diff = csv.writer(self.stdout)
+            diff.writerow(["student_email", "course_id", "old_grade", "new_grade"])
+
+            def on_change(*change):
+                diff.writerow(["" if value is None else value for value in change])
+
+        started = time.perf_counter()
+        from_stdin = options["path"] == "-"
+        stream = sys.stdin if from_stdin else open(options["path"], newline="", encoding="utf-8-sig")
+        try:
+            result = import_grades(stream, options["dry_run"], max(1, options["chunk_size"]), on_change)
+        except GradeFileError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if not from_stdin:
+                stream.close()
+
+        for line, message in result["errors"]:
+            self.stderr.write(f"line {line}: {message}")
+        if result["failed"] > len(result["errors"]):
+            self.stderr.write(f"... and {result['failed'] - len(result['errors'])} more problems")
+        verb = "would be updated" if options["dry_run"] else "updated"
+        self.stderr.write(
+            f"{result['rows']} rows: {result['updated']} grades {verb}, {result['unchanged']} unchanged, "
+            f"{result['failed']} skipped in {time.perf_counter() - started:.2f}s."
+        )
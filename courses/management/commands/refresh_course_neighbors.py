@@ -0,0 +1,24 @@
+# courses/management/commands/refresh_course_neighbors.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.recommendations import refresh_changed_neighbors, refresh_neighbors
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the precomputed \"also liked\" neighbors. By default only courses "
+        "whose favorites changed since the last run, and the courses co-favorited "
+        "with them, are recomputed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild every course's neighbors.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = refresh_neighbors() if options["all"] else refresh_changed_neighbors()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed neighbors for {total} courses in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,23 @@
+# courses/management/commands/refresh_grade_stats.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.analytics import refresh_all_grade_stats, refresh_stale_grade_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized per-course grade statistics. By default only "
+        "courses whose enrollments changed since the last refresh are recomputed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute every course.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = refresh_all_grade_stats() if options["all"] else refresh_stale_grade_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed grade stats for {total} courses in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,148 @@
+# courses/management/commands/run_bench.py
+import json
+import random
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarking import rolled_back, summarize
+from courses.models import Course
+
+User = get_user_model()
+
+DEFAULT_MIX = "browse=70,toggle=20,dashboard=10"
+
+
+def parse_mix(value):
+    try:
+        mix = {name: float(weight) for name, weight in (part.split("=") for part in value.split(","))}
+    except ValueError:
+        raise CommandError(f"Bad --mix {value!r}; expected e.g. {DEFAULT_MIX}")
+    unknown = set(mix) - {"browse", "toggle", "dashboard"}
+    if unknown:
+        raise CommandError(f"Unknown scenario(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of browse/toggle/dashboard requests against the "
+        "app in-process and report latency percentiles and throughput per route "
+        "as JSON. Seed data first with seed_bench; writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument("--students", type=int, default=50,
+                            help="Distinct logged-in students to spread requests over.")
+        parser.add_argument("--mix", default=DEFAULT_MIX)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("-o", "--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        mix = parse_mix(options["mix"])
+        course_ids = list(Course.objects.values_list("id", flat=True))
+        student_ids = list(User.objects.filter(is_student=True).order_by("id").values_list("id", flat=True))
+        students = list(User.objects.filter(id__in=rng.sample(student_ids, min(options["students"], len(student_ids)))))
+        if not course_ids or not students:
+            raise CommandError("No courses or students; run seed_bench first.")
+        titles = list(Course.objects.filter(id__in=rng.sample(course_ids, min(200, len(course_ids))))
+                      .values_list("title", flat=True))
+
+        scenarios = {
+            "browse": [
+                (3, lambda: ("courses:course_list", "get", reverse("courses:course_list"), None)),
+                (3, lambda: ("courses:course_detail", "get",
+                             reverse("courses:course_detail", args=[rng.choice(course_ids)]), None)),
+                (2, lambda: ("courses:course_search", "get", reverse("courses:course_search"),
+                             {"q": " ".join(rng.choice(titles).split()[:rng.randint(1, 2)])})),
+                (1, lambda: ("accounts:landing", "get", reverse("accounts:landing"), None)),
+            ],
+            "toggle": [
+                (1, lambda: ("courses:api_favorite", "json",
+                             reverse("courses:api_favorite", args=[rng.choice(course_ids)]),
+                             {"favorite": rng.random() < 0.6})),
+            ],
+            "dashboard": [
+                (1, lambda: ("accounts:dashboard", "get", reverse("accounts:dashboard"), None)),
+            ],
+        }
+        names = list(mix)
+        weights = [mix[name] for name in names]
+
+        def next_request():
+            routes = scenarios[rng.choices(names, weights)[0]]
+            return rng.choices([r for _, r in routes], [w for w, _ in routes])[0]()
+
+        with rolled_back(), override_settings(ALLOWED_HOSTS=["*"]):
+            clients = []
+            for student in students:
+                client = Client()
+                client.force_login(student)
+                clients.append(client)
+            cache.clear()
+
+            def send(client, request):
+                name, method, url, data = request
+                if method == "json":
+                    response = client.post(url, json.dumps(data), content_type="application/json")
+                else:
+                    response = client.get(url, data)
+                if response.status_code >= 400:
+                    raise CommandError(f"{name} returned {response.status_code}")
+                return name
+
+            for _ in range(options["warmup"]):
+                send(rng.choice(clients), next_request())
+
+            samples = {}
+            started = time.perf_counter()
+            for _ in range(options["requests"]):
+                request = next_request()
+                client = rng.choice(clients)
+                t0 = time.perf_counter()
+                send(client, request)
+                samples.setdefault(request[0], []).append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - started
+            cache.clear()
+
+        all_samples = [s for route in samples.values() for s in route]
+        report = {
+            "revision": git_revision(),
+            "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+            "dataset": {"courses": len(course_ids), "students_used": len(students)},
+            "mix": mix,
+            "requests": len(all_samples),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(all_samples) / elapsed, 1),
+            "overall": summarize(all_samples),
+            "routes": {
+                # requests/sec this route alone sustains on one thread
+                name: {**summarize(route), "throughput_rps": round(len(route) / sum(route), 1)}
+                for name, route in sorted(samples.items())
+            },
+        }
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
@@ -0,0 +1,125 @@
+# courses/management/commands/seed_bench.py
+import random
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import StudentProfile
+from core.benchmarking import make_vocabulary, zipf_weights
+from courses.models import Course, Enrollment, Favorite
+from courses.search import rebuild_index
+
+User = get_user_model()
+
+BENCH_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "bench-pass-123"
+GRADES = ["A", "B", "C", "D", "F", None]
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a synthetic dataset for load benchmarks with bulk inserts: "
+        "students (with profiles), courses, favorites and enrollments. "
+        "Students log in as student<N>@bench.example.com / bench-pass-123."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--courses", type=int, default=5_000)
+        parser.add_argument("--favorites", type=int, default=10,
+                            help="Average favorites per student (default 10).")
+        parser.add_argument("--enrollments", type=int, default=4,
+                            help="Average enrollments per student (default 4).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.batch_size = max(1, options["batch_size"])
+        started = time.perf_counter()
+
+        course_ids = self._courses(rng, options["courses"])
+        user_ids = self._students(options["users"])
+        # a few courses are far more popular than the rest
+        popularity = zipf_weights(len(course_ids)) if course_ids else []
+
+        favorites = self._links(rng, Favorite, user_ids, course_ids, popularity, options["favorites"],
+                                lambda u, c: Favorite(user_id=u, course_id=c))
+        enrollments = self._links(rng, Enrollment, user_ids, course_ids, popularity, options["enrollments"],
+                                  lambda u, c: Enrollment(student_id=u, course_id=c, grade=rng.choice(GRADES)))
+
+        self.stdout.write("Rebuilding search index and counters...")
+        rebuild_index()
+        call_command("rebuild_stats", stdout=StringIO())
+        cache.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} students, {len(course_ids)} courses, {favorites} favorites "
+            f"and {enrollments} enrollments in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def _insert(self, model, objects):
+        """bulk_create an iterable in batches, each in its own transaction."""
+        total, batch = 0, []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                total += self._flush(model, batch)
+                batch = []
+        return total + self._flush(model, batch)
+
+    def _flush(self, model, batch):
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=model is not Course)
+        return len(batch)
+
+    def _courses(self, rng, count):
+        words, cum_weights = make_vocabulary(rng, 5000)
+        first_id = (Course.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+        self._insert(Course, (
+            Course(
+                title=" ".join(rng.choices(words, cum_weights=cum_weights, k=3)).title(),
+                description=" ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(20, 80))),
+            )
+            for _ in range(count)
+        ))
+        self.stdout.write(f"  {count} courses")
+        return list(Course.objects.filter(id__gte=first_id).values_list("id", flat=True))
+
+    def _students(self, count):
+        # numbering continues after earlier runs so they can be stacked
+        offset = User.objects.filter(email__endswith=f"@{BENCH_DOMAIN}").count()
+        password = make_password(BENCH_PASSWORD)  # hashed once, shared by all
+        first_id = (User.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+        self._insert(User, (
+            User(email=f"student{offset + i}@{BENCH_DOMAIN}", name=f"Bench Student {offset + i}",
+                 password=password, is_student=True)
+            for i in range(count)
+        ))
+        user_ids = list(User.objects.filter(id__gte=first_id, email__endswith=f"@{BENCH_DOMAIN}")
+                        .values_list("id", flat=True))
+        # bulk_create skips create_student_profile, so add the profiles here
+        self._insert(StudentProfile, (StudentProfile(user_id=user_id) for user_id in user_ids))
+        self.stdout.write(f"  {len(user_ids)} students")
+        return user_ids
+
+    def _links(self, rng, model, user_ids, course_ids, popularity, average, make):
+        if not course_ids or average <= 0:
+            return 0
+
+        def rows():
+            for user_id in user_ids:
+                k = min(len(course_ids), rng.randint(0, 2 * average))
+                for course_id in set(rng.choices(course_ids, cum_weights=popularity, k=k)):
+                    yield make(user_id, course_id)
+
+        total = self._insert(model, rows())
+        self.stdout.write(f"  {total} {model._meta.verbose_name_plural}")
+        return total
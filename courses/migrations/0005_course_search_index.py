@@ -0,0 +1,43 @@
+# Creates the full-text index used by courses.search. The table is managed
+# outside the ORM because its shape depends on the database backend.
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE courses_course_fts USING fts5(title, description, tokenize='porter unicode61', prefix='2 3')",
+    "INSERT INTO courses_course_fts (rowid, title, description) SELECT id, title, description FROM courses_course",
+]
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS courses_course_fts"]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE courses_course_search ("
+    " course_id bigint PRIMARY KEY REFERENCES courses_course (id) ON DELETE CASCADE,"
+    " document tsvector NOT NULL)",
+    "CREATE INDEX courses_course_search_document_idx ON courses_course_search USING GIN (document)",
+    "INSERT INTO courses_course_search (course_id, document) SELECT id,"
+    " setweight(to_tsvector('english', coalesce(title, '')), 'A') ||"
+    " setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    " FROM courses_course",
+]
+POSTGRES_BACKWARD = ["DROP TABLE IF EXISTS courses_course_search"]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+    ]
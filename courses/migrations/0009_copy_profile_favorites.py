@@ -0,0 +1,67 @@
+# Copies StudentProfile.favorite_courses links into courses.Favorite.
+# Runs outside a single transaction: each batch commits on its own and the
+# inserts ignore rows that already exist, so an interrupted run can simply be
+# started again. Copied rows get the migration time as created_at because the
+# old join table never recorded one.
+from django.db import migrations, transaction
+
+BATCH_SIZE = 5000
+
+
+def copy_profile_favorites(apps, schema_editor):
+    StudentProfile = apps.get_model("accounts", "StudentProfile")
+    Favorite = apps.get_model("courses", "Favorite")
+    StatCounter = apps.get_model("accounts", "StatCounter")
+    Link = StudentProfile.favorite_courses.through
+
+    last_id = 0
+    while True:
+        batch = list(
+            Link.objects.filter(id__gt=last_id).order_by("id")
+            .values_list("id", "studentprofile__user_id", "course_id")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        with transaction.atomic():
+            Favorite.objects.bulk_create(
+                [Favorite(user_id=user_id, course_id=course_id) for _, user_id, course_id in batch],
+                ignore_conflicts=True,
+            )
+        last_id = batch[-1][0]
+
+    # rows that were only in the old admin-only table count from now on too
+    StatCounter.objects.update_or_create(key="favorites", defaults={"value": Favorite.objects.count()})
+
+
+def copy_favorites_back(apps, schema_editor):
+    StudentProfile = apps.get_model("accounts", "StudentProfile")
+    Favorite = apps.get_model("courses", "Favorite")
+    Link = StudentProfile.favorite_courses.through
+
+    last_id = 0
+    while True:
+        batch = list(
+            Favorite.objects.filter(id__gt=last_id, user__studentprofile__isnull=False).order_by("id")
+            .values_list("id", "user__studentprofile__id", "course_id")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        with transaction.atomic():
+            Link.objects.bulk_create(
+                [Link(studentprofile_id=profile_id, course_id=course_id) for _, profile_id, course_id in batch],
+                ignore_conflicts=True,
+            )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0006_outboxemail'),
+        ('courses', '0008_favorite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_profile_favorites, copy_favorites_back),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_copy_profile_favorites'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseGradeStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grade_stats', serialize=False, to='courses.course')),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('graded', models.PositiveIntegerField(default=0)),
+                ('mean_points', models.FloatField(null=True)),
+                ('p25_points', models.FloatField(null=True)),
+                ('median_points', models.FloatField(null=True)),
+                ('p75_points', models.FloatField(null=True)),
+                ('pass_rate', models.FloatField(null=True)),
+                ('distribution', models.JSONField(default=dict)),
+                ('changed_at', models.DateTimeField(null=True)),
+                ('refreshed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
@@ -6,20 +6,44 @@ class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to="course_images/", blank=True, null=True)
+    # manifest of resized copies written by courses.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # backs keyset pagination on (created_at, id)
+            models.Index(fields=["-created_at", "-id"], name="course_created_id_idx"),
+            # max(updated_at) for the course list's validators (courses.conditional)
+            models.Index(fields=["updated_at"], name="course_updated_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
 
 class Favorite(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="favorites")
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="favorited_by")
-    created_at = models.DateTimeField(auto_now_add=True)
+    """
+    The one table of student favorites. Both foreign keys rely on the
+    composite indexes below instead of single-column ones.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                             related_name="favorites", db_index=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE,
+                               related_name="favorited_by", db_index=False)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        unique_together = ("user", "course")
+        constraints = [
+            # also serves "which courses did this user favorite"
+            models.UniqueConstraint(fields=["user", "course"], name="favorite_user_course_uniq"),
+        ]
+        indexes = [
+            # "who favorited X" / "X's favorites over time"; user is a trailing
+            # key so those queries never have to visit the table
+            models.Index(fields=["course", "created_at", "user"], name="favorite_course_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.course}"
@@ -33,6 +57,81 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ("student", "course")
+        indexes = [
+            # backs keyset pagination and date-range filters on the enrollment list
+            models.Index(fields=["-enrolled_on", "-id"], name="enrollment_enrolled_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student} enrolled in {self.course}"
+
+
+class CourseGradeStats(models.Model):
+    """
+    Materialized grade summary for one course, written by courses.analytics.
+    A row is stale while changed_at (bumped when the course's enrollments
+    change) is newer than refreshed_at; refresh_stale_grade_stats()
+    recomputes only those rows.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="grade_stats")
+    enrolled = models.PositiveIntegerField(default=0)
+    graded = models.PositiveIntegerField(default=0)
+    # grade points on the 4.0 scale, None while nothing is graded
+    mean_points = models.FloatField(null=True)
+    p25_points = models.FloatField(null=True)
+    median_points = models.FloatField(null=True)
+    p75_points = models.FloatField(null=True)
+    pass_rate = models.FloatField(null=True)
+    # {"A": n, "B": n, "C": n, "D": n, "F": n, "ungraded": n}
+    distribution = models.JSONField(default=dict)
+    changed_at = models.DateTimeField(null=True)
+    refreshed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Grade stats for course {self.course_id}"
+
+
+class CourseNeighbor(models.Model):
+    """
+    One of a course's top-k "students who favorited this also liked"
+    courses, precomputed by courses.recommendations.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="neighbors", db_index=False)
+    neighbor = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # the detail page reads a course's list in rank order off this index
+            models.UniqueConstraint(fields=["course", "rank"], name="neighbor_course_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} → {self.neighbor_id} ({self.score:.3f})"
+
+
+class CourseNeighborState(models.Model):
+    """
+    When a course's neighbors were last computed. Only the refresh writes
+    these rows; favorite writers append to FavoriteChange instead.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="neighbor_state")
+    refreshed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Neighbor state for course {self.course_id}"
+
+
+class FavoriteChange(models.Model):
+    """
+    A course whose favorites changed since the last neighbor refresh. Rows
+    are only ever inserted (one per course per write, never updated in
+    place) and the refresh deletes the ones it has handled, so a popular
+    course is no hot row for concurrent favorite writers.
+    """
+    course = models.ForeignKey(Course, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                               related_name="+")
+
+    def __str__(self):
+        return f"Favorites changed for course {self.course_id}"
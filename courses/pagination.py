@@ -0,0 +1,136 @@
+# courses/pagination.py
+import base64
+import json
+
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """
+    One page of results plus the opaque cursors for its neighbours.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a descending (timestamp, id) ordering.
+
+    Each page is fetched with a range predicate on the (field, id) pair, so
+    with a matching index page N costs the same as page 1. Cursors encode the
+    boundary row and the direction of travel and are opaque to clients.
+    """
+
+    def __init__(self, queryset, per_page, field="created_at"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def encode_cursor(self, obj, direction):
+        value = getattr(obj, self.field)
+        raw = json.dumps([direction, value.isoformat(), obj.pk], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            direction, value, pk = json.loads(base64.urlsafe_b64decode(padded))
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (ValueError, TypeError):
+            raise InvalidCursor(token)
+        if direction not in ("n", "p") or value is None:
+            raise InvalidCursor(token)
+        return direction, value, pk
+
+    def _query(self, cursor):
+        """The queryset for the page at `cursor` and its direction of travel."""
+        field = self.field
+        if not cursor:
+            return self.queryset.order_by(f"-{field}", "-id")[: self.per_page + 1], None
+
+        direction, value, pk = self.decode_cursor(cursor)
+        # a plain range on `field` lets the index seek to the boundary; the
+        # exclude() only trims rows sharing its timestamp. The equivalent
+        # (field < v OR (field = v AND id < pk)) makes the planner scan the
+        # index from the start instead.
+        if direction == "n":
+            queryset = (
+                self.queryset.filter(**{f"{field}__lte": value}).exclude(**{field: value, "id__gte": pk})
+                .order_by(f"-{field}", "-id")
+            )
+        else:
+            queryset = (
+                self.queryset.filter(**{f"{field}__gte": value}).exclude(**{field: value, "id__lte": pk})
+                .order_by(field, "id")
+            )
+        return queryset[: self.per_page + 1], direction
+
+    def _page(self, rows, direction):
+        """Build the KeysetPage from fetched rows; None if a cursor ran off the end."""
+        items = rows[: self.per_page]
+        more = len(rows) > self.per_page
+        if direction is None:
+            return KeysetPage(items, self.encode_cursor(items[-1], "n") if more else None, None)
+        if not items:
+            return None
+        if direction == "n":
+            next_cursor = self.encode_cursor(items[-1], "n") if more else None
+            return KeysetPage(items, next_cursor, self.encode_cursor(items[0], "p"))
+        items.reverse()
+        previous_cursor = self.encode_cursor(items[0], "p") if more else None
+        return KeysetPage(items, self.encode_cursor(items[-1], "n"), previous_cursor)
+
+    def get_page(self, cursor=None):
+        """
+        Return the page after ("n") or before ("p") the row encoded in
+        `cursor`, or the first page when no cursor is given.
+        """
+        queryset, direction = self._query(cursor)
+        page = self._page(list(queryset), direction)
+        return page if page is not None else self.get_page()
+
+    async def aget_page(self, cursor=None):
+        """Async get_page() for async views."""
+        queryset, direction = self._query(cursor)
+        page = self._page([row async for row in queryset], direction)
+        return page if page is not None else await self.aget_page()
+
+    def get_page_or_first(self, cursor=None):
+        """Like get_page(), but falls back to the first page on a bad cursor."""
+        try:
+            return self.get_page(cursor)
+        except InvalidCursor:
+            return self.get_page()
+
+    async def aget_page_or_first(self, cursor=None):
+        try:
+            return await self.aget_page(cursor)
+        except InvalidCursor:
+            return await self.aget_page()
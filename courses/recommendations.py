@@ -0,0 +1,166 @@
+# courses/recommendations.py
+"""
+"Students who favorited this also liked" via item-item cosine similarity.
+
+All favorites are loaded once into a sparse user x course matrix X. For a
+batch of courses B, X[:, B].T @ X gives how many students favorited each
+pair; dividing by sqrt(n_b * n_c) turns that into the cosine similarity of
+the two (binary) course columns. The best TOP_K per course are stored in
+CourseNeighbor, so the detail page reads them with one indexed query.
+
+Favorite writers call mark_neighbors_changed(), which only appends to the
+FavoriteChange log; an incremental refresh recomputes the logged courses
+plus every course co-favorited with them, since a change in one course's
+favorites moves its similarity to all of those, and then prunes the log.
+"""
+import itertools
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Course, CourseNeighbor, CourseNeighborState, Favorite, FavoriteChange
+
+TOP_K = 8
+# pairs favorited together by fewer students than this are noise
+MIN_CO_FAVORITES = 2
+# courses per sparse product; bounds the memory of the co-favorite block
+BATCH_SIZE = 256
+
+
+def mark_neighbors_changed(course_ids):
+    """Record that the favorites of `course_ids` changed (one INSERT, no upsert)."""
+    FavoriteChange.objects.bulk_create(
+        [FavoriteChange(course_id=course_id) for course_id in set(course_ids)], batch_size=2000,
+    )
+
+
+def also_liked(course_id):
+    """The stored neighbors of `course_id`, best first: one query on the (course, rank) index."""
+    return (
+        CourseNeighbor.objects.filter(course_id=course_id).order_by("rank")
+        .select_related("neighbor").only("neighbor_id", "neighbor__title")
+    )
+
+
+def changed_course_ids(last_change=None):
+    """Courses logged as changed, up to the change id `last_change` if given."""
+    changes = FavoriteChange.objects.all()
+    if last_change is not None:
+        changes = changes.filter(id__lte=last_change)
+    return list(changes.order_by("course_id").values_list("course_id", flat=True).distinct())
+
+
+def _last_change():
+    return FavoriteChange.objects.aggregate(last=Max("id"))["last"]
+
+
+def load_matrix():
+    """
+    (course ids, X) where X is the binary users x courses CSC matrix and
+    column j belongs to course ids[j].
+    """
+    from scipy import sparse  # only the refresh needs it, not every web process
+
+    rows = Favorite.objects.order_by().values_list("user_id", "course_id").iterator(chunk_size=20000)
+    pairs = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+    users, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    courses, course_index = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csc_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, course_index)),
+        shape=(len(users), len(courses)),
+    )
+    return courses, matrix
+
+
+def top_neighbors(matrix, columns, counts, k=TOP_K, min_common=MIN_CO_FAVORITES):
+    """
+    Yield (column, neighbor columns, scores) for each of `columns`, best
+    first; `counts` holds the number of favorites of every column.
+    """
+    common = (matrix[:, columns].T @ matrix).tocsr()
+    for row, column in enumerate(columns):
+        span = slice(common.indptr[row], common.indptr[row + 1])
+        others, together = common.indices[span], common.data[span]
+        keep = (others != column) & (together >= min_common)
+        others, together = others[keep], together[keep]
+        scores = together / np.sqrt(counts[column] * counts[others])
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            others, scores = others[best], scores[best]
+        order = np.lexsort((others, -scores))  # ties go to the lower course id
+        yield column, others[order], scores[order]
+
+
+def _store(course_ids, rows, refreshed_at):
+    with transaction.atomic():
+        CourseNeighbor.objects.filter(course_id__in=course_ids).delete()
+        CourseNeighbor.objects.bulk_create(rows, batch_size=2000)
+        CourseNeighborState.objects.bulk_create(
+            [CourseNeighborState(course_id=course_id, refreshed_at=refreshed_at) for course_id in course_ids],
+            update_conflicts=True, unique_fields=["course"], update_fields=["refreshed_at"], batch_size=2000,
+        )
+
+
+def refresh_neighbors(course_ids=None):
+    """
+    Recompute neighbors for every course (`course_ids` None) or for the given
+    changed courses, those co-favorited with them and those listing them as
+    a neighbor. Returns how many courses were recomputed.
+    """
+    started = timezone.now()
+    last_change = _last_change() if course_ids is None else None
+    if course_ids is not None:
+        course_ids = list(course_ids)
+    courses, matrix = load_matrix()
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    if course_ids is None:
+        columns = np.arange(len(courses))
+        cleared = list(CourseNeighbor.objects.exclude(course_id__in=Favorite.objects.values("course_id"))
+                       .values_list("course_id", flat=True).distinct())
+    else:
+        requested = np.unique(np.asarray(course_ids, dtype=np.int64))
+        changed = np.searchsorted(courses, requested[np.isin(requested, courses)])
+        # courses still listing a changed one may have no co-favorites with it
+        # left, so the product below would miss them
+        listing = np.fromiter(
+            CourseNeighbor.objects.filter(neighbor_id__in=requested.tolist())
+            .values_list("course_id", flat=True).distinct(), dtype=np.int64,
+        )
+        affected = np.union1d(requested, listing)
+        present = np.isin(affected, courses)
+        columns = np.union1d(
+            np.searchsorted(courses, affected[present]), (matrix[:, changed].T @ matrix).tocsr().indices,
+        )
+        # courses left without favorites lose their lists
+        cleared = affected[~present].tolist()
+
+    total = 0
+    for start in range(0, len(columns), BATCH_SIZE):
+        batch = columns[start:start + BATCH_SIZE]
+        rows = []
+        for column, others, scores in top_neighbors(matrix, batch, counts):
+            rows += [
+                CourseNeighbor(course_id=int(courses[column]), neighbor_id=int(courses[other]),
+                               rank=rank, score=round(float(score), 6))
+                for rank, (other, score) in enumerate(zip(others, scores), start=1)
+            ]
+        _store(courses[batch].tolist(), rows, started)
+        total += len(batch)
+    if cleared:
+        # deleted courses take their neighbors and state rows with them
+        _store(list(Course.objects.filter(pk__in=cleared).values_list("pk", flat=True)), [], started)
+    if last_change is not None:
+        # changes logged after the snapshot wait for the next refresh
+        FavoriteChange.objects.filter(id__lte=last_change).delete()
+    return total
+
+
+def refresh_changed_neighbors():
+    last_change = _last_change()
+    if last_change is None:
+        return 0
+    total = refresh_neighbors(changed_course_ids(last_change))
+    FavoriteChange.objects.filter(id__lte=last_change).delete()
+    return total
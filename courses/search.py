@@ -0,0 +1,186 @@
+# courses/search.py
+"""
+Full-text search over Course.title and Course.description.
+
+SQLite keeps an FTS5 table keyed by course id, PostgreSQL a tsvector table
+with a GIN index; both are created by migration 0005. Any other backend falls
+back to an icontains scan. The receivers at the bottom keep the index in step
+with Course saves and deletes; bulk writers call index_courses() themselves.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course
+
+FTS_TABLE = "courses_course_fts"
+PG_TABLE = "courses_course_search"
+CHUNK_SIZE = 500
+
+# title matches count ten times as much as description matches
+FTS_RANK = f"bm25({FTS_TABLE}, 10.0, 1.0)"
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(%s, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(%s, '')), 'B')"
+)
+
+
+# dropped from queries unless nothing else is left; PostgreSQL's english
+# configuration already ignores them
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from how in into is it of on or the to what with".split()
+)
+
+
+def _tokens(query):
+    tokens = re.findall(r"\w+", query.lower())[:16]
+    return [t for t in tokens if t not in STOP_WORDS] or tokens
+
+
+def _fts_match(tokens):
+    # only the last term is treated as a prefix (search-as-you-type); prefix
+    # scans of short terms are what make FTS5 queries expensive
+    terms = [f'"{t}"' for t in tokens]
+    if len(tokens[-1]) >= 2:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def index_courses(courses):
+    """Insert or refresh the index rows for `courses` (saved instances)."""
+    rows = [(c.pk, c.title, c.description) for c in courses]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for chunk in _chunks(rows):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})",
+                    [pk for pk, _, _ in chunk],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)",
+                    chunk,
+                )
+        elif connection.vendor == "postgresql":
+            cursor.executemany(
+                f"INSERT INTO {PG_TABLE} (course_id, document) VALUES (%s, {PG_DOCUMENT}) "
+                f"ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+
+def remove_courses(pks):
+    pks = list(pks)
+    if not pks:
+        return
+    if connection.vendor == "sqlite":
+        table, column = FTS_TABLE, "rowid"
+    elif connection.vendor == "postgresql":
+        table, column = PG_TABLE, "course_id"
+    else:
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(pks):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", chunk)
+
+
+def rebuild_index(batch_size=2000):
+    """Repopulate the whole index from the course table; returns rows indexed."""
+    if connection.vendor == "sqlite":
+        table = FTS_TABLE
+    elif connection.vendor == "postgresql":
+        table = PG_TABLE
+    else:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+
+    total, batch = 0, []
+    for course in Course.objects.only("id", "title", "description").iterator(chunk_size=batch_size):
+        batch.append(course)
+        if len(batch) >= batch_size:
+            index_courses(batch)
+            total += len(batch)
+            batch = []
+    index_courses(batch)
+    return total + len(batch)
+
+
+def search_course_ids(query, offset=0, limit=20):
+    """
+    (course ids matching `query` best match first, windowed). When a query
+    matches more than settings.COURSE_SEARCH_MAX_CANDIDATES courses only the
+    newest that many are ranked and `windowed` is True; otherwise every
+    match is ranked.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return [], False
+
+    # Scoring every match of a very common term is what makes broad queries
+    # slow (bench_search's p95 goes from ~30 ms to ~115 ms at 100k courses),
+    # so those rank a window of the newest matches. One more candidate than
+    # the window is fetched to tell the two cases apart.
+    candidates = settings.COURSE_SEARCH_MAX_CANDIDATES
+    if connection.vendor == "sqlite":
+        sql = (
+            f"SELECT id, count(*) OVER () FROM (SELECT rowid AS id, {FTS_RANK} AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s) "
+            f"ORDER BY score, id DESC LIMIT %s OFFSET %s"
+        )
+        params = [_fts_match(tokens), candidates + 1, limit, offset]
+    elif connection.vendor == "postgresql":
+        sql = (
+            f"SELECT course_id, count(*) OVER () FROM (SELECT course_id, ts_rank(document, query) AS score "
+            f"FROM {PG_TABLE}, to_tsquery('english', %s) query WHERE document @@ query "
+            f"ORDER BY course_id DESC LIMIT %s) candidates "
+            f"ORDER BY score DESC, course_id DESC LIMIT %s OFFSET %s"
+        )
+        params = [" & ".join(tokens[:-1] + [f"{tokens[-1]}:*"]), candidates + 1, limit, offset]
+    else:
+        qs = Course.objects.all()
+        for token in tokens:
+            qs = qs.filter(Q(title__icontains=token) | Q(description__icontains=token))
+        return list(qs.order_by("-created_at", "-id").values_list("id", flat=True)[offset:offset + limit]), False
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [row[0] for row in rows], bool(rows) and rows[0][1] > candidates
+
+
+def search_courses(query, page=1, per_page=20):
+    """
+    Return (courses, has_next, windowed) for one page of ranked results;
+    see search_course_ids() for `windowed`.
+    """
+    offset = (max(page, 1) - 1) * per_page
+    ids, windowed = search_course_ids(query, offset, per_page + 1)
+    has_next = len(ids) > per_page
+    ids = ids[:per_page]
+    by_id = Course.objects.in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id], has_next, windowed
+
+
+# Signals: keep the search index in step with Course
+@receiver(post_save, sender=Course)
+def index_course_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_courses([instance])
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_on_delete(sender, instance, **kwargs):
+    remove_courses([instance.pk])
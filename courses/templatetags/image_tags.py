@@ -0,0 +1,30 @@
+# courses/templatetags/image_tags.py
+from django import template
+from django.utils.html import format_html
+
+from courses.images import has_variants, srcset, variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(field_file, manifest, sizes, alt="", css_class="", style=""):
+    """
+    Render a <picture> with WebP and JPEG/PNG srcsets for an uploaded image,
+    or a plain <img> of the original while its variants are being built.
+    """
+    if not has_variants(field_file, manifest):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="lazy">',
+            field_file.url, alt, css_class, style,
+        )
+    fallback = manifest["fallback"]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="lazy">'
+        '</picture>',
+        srcset(field_file, manifest, "webp"), sizes,
+        variant_url(field_file, manifest, 640), srcset(field_file, manifest, fallback), sizes,
+        alt, css_class, style,
+    )
@@ -1,3 +1,778 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import StatCounter
+from core.benchmarking import async_views
+from .favorites import get_favorite_ids, set_favorite
+from .fragments import course_card_key
+from .analytics import refresh_stale_grade_stats, stale_course_ids
+from .enrollments import CohortTooLarge, bulk_enroll
+from .grades import GradeFileError, import_grades
+from .images import build_variants_for, variant_name
+from .models import Course, CourseGradeStats, CourseNeighbor, Enrollment, Favorite, FavoriteChange
+from .pagination import KeysetPaginator
+from .views import CourseAnalyticsView
+from .recommendations import changed_course_ids, refresh_changed_neighbors, refresh_neighbors
+from .search import index_courses, search_courses
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Course.objects.bulk_create(Course(title=f"Course {i}", description="d") for i in range(7))
+
+    def test_walks_forward_and_back_over_every_row(self):
+        paginator = KeysetPaginator(Course.objects.all(), per_page=3)
+        expected = list(Course.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([c.id for p in pages for c in p], expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual([c.id for c in back], [c.id for c in pages[-2]])
+
+    async def test_async_pages_match_sync_pages(self):
+        paginator = KeysetPaginator(Course.objects.all(), per_page=3)
+        cursor = None
+        while True:
+            page = await paginator.aget_page(cursor)
+            expected = await sync_to_async(paginator.get_page)(cursor)
+            self.assertEqual([c.id for c in page], [c.id for c in expected])
+            self.assertEqual(page.previous_cursor, expected.previous_cursor)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+    def test_ties_and_index_seek(self):
+        Course.objects.update(created_at=timezone.now())  # every row shares one timestamp
+        paginator = KeysetPaginator(Course.objects.all(), per_page=3)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([c.id for p in pages for c in p],
+                         list(Course.objects.order_by("-id").values_list("id", flat=True)))
+        self.assertEqual([c.id for c in paginator.get_page(pages[-1].previous_cursor)], [c.id for c in pages[-2]])
+
+        if connection.vendor == "sqlite":
+            for cursor in (pages[1].next_cursor, pages[1].previous_cursor):
+                plan = paginator._query(cursor)[0].explain()
+                self.assertIn("SEARCH courses_course USING INDEX course_created_id_idx", plan)
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Course.objects.all(), per_page=3)
+        page = paginator.get_page_or_first("not-a-cursor")
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_previous)
+
+
+class FavoriteIdsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("fav@example.com", "Fav", "pass-12345")
+        self.course = Course.objects.create(title="Physics", description="Motion")
+
+    def test_set_is_cached_until_favorites_change(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_favorite_ids(self.user), set())
+        with self.assertNumQueries(0):
+            get_favorite_ids(self.user)
+
+        self.client.force_login(self.user)
+        self.client.post(reverse("courses:toggle_favorite", args=[self.course.pk]))
+        self.assertEqual(get_favorite_ids(self.user), {self.course.pk})
+
+        set_favorite(self.user, self.course.pk, False)
+        self.assertEqual(get_favorite_ids(self.user), set())
+
+
+class CourseSearchTests(TestCase):
+    def test_ranked_results_follow_saves_and_deletes(self):
+        in_body = Course.objects.create(title="Statistics", description="Uses probability in places")
+        in_title = Course.objects.create(title="Probability theory", description="Random variables")
+        Course.objects.create(title="Poetry", description="Verse")
+
+        results, has_next, windowed = search_courses("probability")
+        self.assertEqual(results, [in_title, in_body])
+        self.assertFalse(has_next or windowed)
+        self.assertEqual(search_courses("probability theor")[0], [in_title])
+
+        in_title.title = "Measure theory"
+        in_title.description = "Sigma algebras"
+        in_title.save()
+        in_body.delete()
+        self.assertEqual(search_courses("probability")[0], [])
+
+    def test_every_match_is_ranked_below_the_window(self):
+        best = Course.objects.create(title="Topology", description="Open sets")
+        Course.objects.bulk_create([Course(title=f"Course {i}", description="Mentions topology once")
+                                    for i in range(30)])
+        index_courses(Course.objects.exclude(pk=best.pk))
+
+        with override_settings(COURSE_SEARCH_MAX_CANDIDATES=31):
+            first, has_next, windowed = search_courses("topology", per_page=20)
+            self.assertEqual((first[0], has_next, windowed), (best, True, False))
+            second, has_next, _ = search_courses("topology", page=2, per_page=20)
+            self.assertEqual((len(second), has_next), (11, False))
+            self.assertFalse({c.pk for c in first} & {c.pk for c in second})
+
+        # a broader query ranks only the newest matches, and says so
+        with override_settings(COURSE_SEARCH_MAX_CANDIDATES=29):
+            first, _, windowed = search_courses("topology", per_page=20)
+            self.assertNotIn(best, first)
+            self.assertTrue(windowed)
+            user = get_user_model().objects.create_user("search@example.com", "Search", "pass-12345")
+            self.client.force_login(user)
+            response = self.client.get(reverse("courses:course_search"), {"q": "topology"})
+            self.assertContains(response, "More than 29 courses match")
+
+    def test_search_view(self):
+        user = get_user_model().objects.create_user("search@example.com", "Search", "pass-12345")
+        Course.objects.create(title="Databases", description="SQL and indexes")
+        self.client.force_login(user)
+        response = self.client.get(reverse("courses:course_search"), {"q": "index"})
+        self.assertContains(response, "Databases")
+
+        with override_settings(COURSE_SEARCH_MAX_CANDIDATES=50):
+            for page, expected in (("99999999999999999999", 3), ("abc", 1), ("-4", 1)):
+                response = self.client.get(reverse("courses:course_search"), {"q": "index", "page": page})
+                self.assertEqual(response.context["page_number"], expected)
+
+
+class FavoriteAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("api@example.com", "Api", "pass-12345")
+        self.courses = [Course.objects.create(title=f"C{i}", description="d") for i in range(3)]
+        self.client.force_login(self.user)
+
+    def post_json(self, url, data):
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_set_is_idempotent(self):
+        url = reverse("courses:api_favorite", args=[self.courses[0].pk])
+        self.assertEqual(self.post_json(url, {"favorite": True}).json()["changed"], True)
+        self.assertEqual(self.post_json(url, {"favorite": True}).json()["changed"], False)
+        self.assertEqual(get_favorite_ids(self.user), {self.courses[0].pk})
+        self.assertEqual(self.post_json(url, {"favorite": "yes"}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_batch_applies_operations_in_order(self):
+        a, b, c = (course.pk for course in self.courses)
+        response = self.post_json(reverse("courses:api_favorites_batch"), {"operations": [
+            {"course": a, "favorite": True},
+            {"course": b, "favorite": True},
+            {"course": a, "favorite": False},
+            {"course": c + 100, "favorite": True},
+        ]})
+        self.assertEqual(response.json()["missing"], [c + 100])
+        self.assertEqual(get_favorite_ids(self.user), {b})
+        self.assertEqual(StatCounter.snapshot()[StatCounter.FAVORITES], 1)
+
+    def test_toggle_no_longer_accepts_get(self):
+        url = reverse("courses:toggle_favorite", args=[self.courses[0].pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+
+class FavoriteConcurrencyTests(TransactionTestCase):
+    threads = 8
+    rounds = 10
+
+    def test_many_threads_hammering_one_user(self):
+        user = get_user_model().objects.create_user("race@example.com", "Race", "pass-12345")
+        course_ids = [Course.objects.create(title=f"R{i}", description="d").pk for i in range(6)]
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def worker(n):
+            try:
+                barrier.wait()
+                for _ in range(self.rounds):
+                    for course_id in course_ids:
+                        set_favorite(user, course_id, True)
+                barrier.wait()
+                # everyone now removes the odd courses at the same time
+                for course_id in course_ids[1::2]:
+                    set_favorite(user, course_id, False)
+            except Exception as exc:  # surfaced in the main thread
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        self.assertEqual(errors, [])
+        stored = list(Favorite.objects.filter(user=user).values_list("course_id", flat=True))
+        self.assertCountEqual(stored, course_ids[0::2])
+        self.assertEqual(StatCounter.snapshot()[StatCounter.FAVORITES], len(stored))
+
+
+class ImportCoursesTests(TestCase):
+    def test_jsonl_import_rejects_invalid_rows(self):
+        rows = [
+            {"title": "Astronomy", "description": "Stars"},
+            {"title": "", "description": "Missing title"},
+            {"title": "Geology", "description": "Rocks"},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as fh:
+            fh.write("\n".join(json.dumps(r) for r in rows) + "\nnot json\n")
+        self.addCleanup(os.unlink, fh.name)
+
+        out = StringIO()
+        call_command("import_courses", fh.name, batch_size=1, stdout=out)
+        self.assertIn("Imported 2 courses, rejected 2 rows", out.getvalue())
+        self.assertEqual(StatCounter.snapshot()[StatCounter.COURSES], 2)
+        self.assertEqual([c.title for c in search_courses("rocks")[0]], ["Geology"])
+
+    def test_images_are_validated_and_stored_after_commit(self):
+        images = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=f"{images}/media", IMAGE_VARIANTS_ASYNC=False))
+        Image.new("RGB", (400, 200), "navy").save(f"{images}/optics.jpg", format="JPEG")
+        with open(f"{images}/notes.jpg", "w") as fh:
+            fh.write("not an image")
+        source = f"{images}/courses.csv"
+        with open(source, "w") as fh:
+            fh.write("title,description,image\nOptics,Light,optics.jpg\nNotes,Text,notes.jpg\n")
+
+        call_command("import_courses", source, images_dir=images, rejects=f"{images}/rejects.csv", stdout=StringIO())
+        course = Course.objects.get()
+        self.assertEqual(course.title, "Optics")
+        self.assertTrue(course.image.name.endswith(".jpg"))
+        self.assertTrue(course.image.storage.exists(course.image.name))
+        with open(f"{images}/rejects.csv") as fh:
+            rejects = list(csv.reader(fh))
+        self.assertEqual([row[0] for row in rejects], ["line", "3"])
+        self.assertIn("image", json.loads(rejects[1][1]))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_VARIANTS_ASYNC=False)
+class ImageVariantTests(TestCase):
+    def upload(self, size=(800, 400)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "navy").save(buffer, format="JPEG")
+        return SimpleUploadedFile("cover.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def test_variants_are_built_after_commit_and_rendered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title="Optics", description="Light", image=self.upload())
+        course.refresh_from_db()
+
+        manifest = course.image_variants
+        self.assertEqual(manifest, {"source": course.image.name, "widths": [320, 640], "fallback": "jpg"})
+        with course.image.storage.open(variant_name(course.image.name, 320, "webp")) as fh:
+            self.assertEqual(Image.open(fh).size, (320, 160))
+
+        user = get_user_model().objects.create_user("img@example.com", "Img", "pass-12345")
+        self.client.force_login(user)
+        response = self.client.get(reverse("courses:course_list"))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, "-640w.webp 640w")
+
+    def test_replaced_image_ignores_stale_manifest(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title="Optics", description="Light", image=self.upload())
+        course.refresh_from_db()
+        course.image = self.upload((200, 100))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            course.save()
+        self.assertEqual(len(callbacks), 1)
+
+    def test_backfill_counts_vanished_images_apart(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Course.objects.create(title="Optics", description="Light", image=self.upload())
+            gone = Course.objects.create(title="Acoustics", description="Sound", image=self.upload())
+        self.assertIsNone(build_variants_for(Course, 0))
+
+        def build(model, pk):
+            # the row is deleted while the job waits in the pool
+            return None if pk == gone.pk else {"source": "x", "widths": [320], "fallback": "jpg"}
+
+        out = StringIO()
+        with mock.patch("courses.management.commands.build_image_variants.build_variants_for", build):
+            call_command("build_image_variants", workers=1, stdout=out)
+        self.assertIn("Building variants for 2 images", out.getvalue())
+        self.assertIn("Built 1, vanished 1, failed 0.", out.getvalue())
+
+
+class EnrollmentExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True, is_student=False)
+        cls.math = Course.objects.create(title="Math", description="d")
+        cls.art = Course.objects.create(title="Art", description="d")
+        for i in range(3):
+            student = User.objects.create_user(f"e{i}@example.com", f"Student {i}", "pass-12345")
+            Enrollment.objects.create(student=student, course=cls.math, grade="A" if i else "B")
+            Enrollment.objects.create(student=student, course=cls.art)
+
+    def test_list_is_paged_and_admin_only(self):
+        self.client.force_login(get_user_model().objects.get(email="e0@example.com"))
+        self.assertEqual(self.client.get(reverse("courses:enrollments_list")).status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("courses:enrollments_list"), {"course": self.math.pk})
+        self.assertEqual(len(response.context["enrollments"]), 3)
+        self.assertContains(response, "Student 2")
+
+    def test_export_streams_filtered_csv(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("courses:enrollments_export"),
+                                   {"course": self.math.pk, "grade": "A", "format": "csv"})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,student_email,student_name,course_id,course_title,enrolled_on,grade")
+        self.assertEqual(sorted(line.split(",")[1] for line in lines[1:]), ["e1@example.com", "e2@example.com"])
+
+    def test_command_writes_jsonl(self):
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as fh:
+            call_command("export_enrollments", output=fh.name, format="jsonl", course=self.art.pk,
+                         stderr=StringIO())
+            rows = [json.loads(line) for line in open(fh.name)]
+        self.assertEqual({row["course_title"] for row in rows}, {"Art"})
+        self.assertEqual(len(rows), 3)
+
+
+class CourseCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("card@example.com", "Card", "pass-12345")
+        self.course = Course.objects.create(title="Chemistry", description="Atoms")
+        self.client.force_login(self.user)
+
+    def test_card_is_cached_per_version_and_evicted_on_edit(self):
+        self.client.get(reverse("courses:course_list"))
+        old_key = course_card_key(self.course.pk, self.course.updated_at)
+        self.assertIn("Chemistry", cache.get(old_key))
+
+        course = Course.objects.get(pk=self.course.pk)
+        course.title = "Organic chemistry"
+        course.save()
+        self.assertIsNone(cache.get(old_key))
+        self.assertContains(self.client.get(reverse("courses:course_list")), "Organic chemistry")
+
+        course.delete()
+        self.assertIsNone(cache.get(course_card_key(course.pk, course.updated_at)))
+
+    def test_favorite_state_is_not_cached(self):
+        url = reverse("courses:course_list")
+        self.client.get(url)
+        set_favorite(self.user, self.course.pk, True)
+        self.assertContains(self.client.get(url), "Unfavorite")
+
+        Enrollment.objects.create(student=self.user, course=self.course)
+        self.assertContains(self.client.get(reverse("courses:my_courses")), "Unfavorite")
+
+
+class LoadBenchTests(TestCase):
+    def test_seed_then_replay_mix(self):
+        call_command("seed_bench", users=12, courses=30, favorites=3, enrollments=2, stdout=StringIO())
+        self.assertEqual(get_user_model().objects.filter(studentprofile__isnull=False).count(), 12)
+        self.assertEqual(StatCounter.snapshot()[StatCounter.FAVORITES], Favorite.objects.count())
+
+        out = StringIO()
+        call_command("run_bench", requests=40, warmup=5, students=4, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["requests"], 40)
+        self.assertIn("courses:course_list", report["routes"])
+        self.assertGreater(report["routes"]["courses:course_list"]["p95_ms"], 0)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.enterContext(async_views())
+        User = get_user_model()
+        self.student = User.objects.create_user("async@example.com", "Async Student", "pass-12345")
+        self.admin = User.objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True, is_student=False)
+        self.course = Course.objects.create(title="Concurrency", description="Event loops")
+        Enrollment.objects.create(student=self.student, course=self.course, grade="A")
+        set_favorite(self.student, self.course.pk, True)
+        call_command("rebuild_stats", stdout=StringIO())
+        cache.clear()
+
+    async def test_read_pages_render_from_async_views(self):
+        client = AsyncClient()
+        await client.aforce_login(self.student)
+        pages = {
+            "accounts:landing": ([], "Welcome back, Async Student"),
+            "accounts:dashboard": ([], "Concurrency"),
+            "courses:course_list": ([], "Concurrency"),
+            "courses:course_detail": ([self.course.pk], "1 student"),
+            "courses:my_courses": ([], "Grade:</strong> A"),
+        }
+        for name, (args, text) in pages.items():
+            with self.subTest(name):
+                response = await client.get(reverse(name, args=args))
+                self.assertTrue(response.resolver_match.func.view_class.__module__.endswith("async_views"))
+                self.assertContains(response, text)
+
+        admin = AsyncClient()
+        await admin.aforce_login(self.admin)
+        response = await admin.get(reverse("accounts:dashboard"))
+        self.assertEqual(response.context["stats"]["favorites_count"], 1)
+
+    async def test_anonymous_users_are_sent_to_login(self):
+        response = await AsyncClient().get(reverse("courses:course_list"))
+        self.assertRedirects(response, f"{reverse('accounts:login')}?next={reverse('courses:course_list')}",
+                             fetch_redirect_response=False)
+        response = await AsyncClient().get(reverse("accounts:landing"))
+        self.assertEqual(response.status_code, 200)
+
+
+class GradeAnalyticsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = Course.objects.create(title="Statistics", description="Means")
+        self.empty = Course.objects.create(title="Empty", description="Nobody")
+        for i, grade in enumerate(["A", "b+", " C ", "F", "D-", None, "incomplete"]):
+            student = User.objects.create_user(f"g{i}@example.com", "Student", "pass-12345")
+            Enrollment.objects.create(student=student, course=self.course, grade=grade)
+
+    def test_stats_match_a_per_row_computation(self):
+        refresh_stale_grade_stats()
+        stats = CourseGradeStats.objects.get(course=self.course)
+        points = sorted([4.0, 3.3, 2.0, 0.0, 0.7])
+        self.assertEqual((stats.enrolled, stats.graded), (7, 5))
+        self.assertAlmostEqual(stats.mean_points, sum(points) / 5)
+        self.assertAlmostEqual(stats.median_points, 2.0)
+        self.assertAlmostEqual(stats.p25_points, 0.7)
+        self.assertAlmostEqual(stats.p75_points, 3.3)
+        self.assertAlmostEqual(stats.pass_rate, 0.8)
+        self.assertEqual(stats.distribution, {"A": 1, "B": 1, "C": 1, "D": 1, "F": 1, "ungraded": 2})
+
+        empty = CourseGradeStats.objects.get(course=self.empty)
+        self.assertEqual((empty.enrolled, empty.graded, empty.mean_points), (0, 0, None))
+
+    def test_only_changed_courses_are_refreshed(self):
+        self.assertEqual(refresh_stale_grade_stats(), 2)
+        self.assertEqual(refresh_stale_grade_stats(), 0)
+
+        Enrollment.objects.filter(course=self.course, grade="F").get().delete()
+        self.assertEqual(stale_course_ids(), [self.course.pk])
+        refresh_stale_grade_stats()
+        self.assertEqual(CourseGradeStats.objects.get(course=self.course).graded, 4)
+
+        admin = get_user_model().objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse("courses:course_analytics"))
+        self.assertContains(response, "100%")
+
+    def test_the_view_refreshes_only_the_courses_it_shows(self):
+        refresh_stale_grade_stats()
+        Enrollment.objects.filter(course=self.course, grade="F").get().delete()
+        Enrollment.objects.create(student=get_user_model().objects.first(), course=self.empty, grade="A")
+        admin = get_user_model().objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True)
+        self.client.force_login(admin)
+
+        with mock.patch.object(CourseAnalyticsView, "paginate_by", 1):
+            response = self.client.get(reverse("courses:course_analytics"))
+        # newest first: only Empty is on the page
+        self.assertContains(response, "Empty")
+        self.assertNotContains(response, "Statistics")
+        self.assertEqual(CourseGradeStats.objects.get(course=self.empty).graded, 1)
+        self.assertEqual(stale_course_ids(), [self.course.pk])
+
+
+class CourseNeighborTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.a, self.b, self.c, self.d = (
+            Course.objects.create(title=title, description="x") for title in ("Alpha", "Beta", "Gamma", "Delta")
+        )
+        self.users = []
+        for i, courses in enumerate([(self.a, self.b, self.c), (self.a, self.b), (self.a, self.b, self.c),
+                                     (self.c, self.d)]):
+            user = User.objects.create_user(f"n{i}@example.com", "Student", "pass-12345")
+            self.users.append(user)
+            for course in courses:
+                Favorite.objects.create(user=user, course=course)
+
+    def neighbors(self, course):
+        return [(n.neighbor_id, round(n.score, 4)) for n in CourseNeighbor.objects.filter(course=course).order_by("rank")]
+
+    def test_unfavoriting_drops_the_course_from_other_lists(self):
+        refresh_neighbors()
+        self.assertIn(self.a.pk, [pk for pk, _ in self.neighbors(self.b)])
+        # A and B keep no co-favorites once these students unfavorite A
+        for user in self.users[:3]:
+            set_favorite(user, self.a.pk, False)
+
+        refresh_changed_neighbors()
+        self.assertEqual(self.neighbors(self.a), [])
+        self.assertNotIn(self.a.pk, [pk for pk, _ in self.neighbors(self.b)])
+        self.assertNotIn(self.a.pk, [pk for pk, _ in self.neighbors(self.c)])
+
+    def test_full_refresh_ranks_by_cosine_similarity(self):
+        self.assertEqual(refresh_neighbors(), 4)
+        self.assertEqual(self.neighbors(self.a), [(self.b.pk, 1.0), (self.c.pk, round(2 / 3, 4))])
+        # one student in common is below MIN_CO_FAVORITES
+        self.assertEqual(self.neighbors(self.d), [])
+        self.assertEqual(changed_course_ids(), [])
+
+    def test_incremental_refresh_follows_favorite_changes(self):
+        refresh_neighbors()
+        set_favorite(self.users[3], self.a.pk, True)
+        self.assertEqual(changed_course_ids(), [self.a.pk])
+
+        # writers only append to the change log; the refresh prunes it
+        set_favorite(self.users[3], self.a.pk, False)
+        set_favorite(self.users[3], self.a.pk, True)
+        self.assertEqual(FavoriteChange.objects.filter(course=self.a).count(), 3)
+
+        # Alpha plus every course co-favorited with it
+        self.assertEqual(refresh_changed_neighbors(), 4)
+        self.assertFalse(FavoriteChange.objects.exists())
+        score = round(3 / 12 ** 0.5, 4)
+        self.assertEqual(self.neighbors(self.a), [(self.b.pk, score), (self.c.pk, score)])
+        self.assertEqual(refresh_changed_neighbors(), 0)
+
+        self.client.force_login(self.users[0])
+        response = self.client.get(reverse("courses:course_detail", args=[self.a.pk]))
+        self.assertContains(response, "also liked")
+        self.assertEqual([n.neighbor_id for n in response.context["also_liked"]], [self.b.pk, self.c.pk])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user("etag@example.com", "Student", "pass-12345")
+        self.course = Course.objects.create(title="Caching", description="Validators")
+        self.client.force_login(self.student)
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+    def test_unchanged_pages_are_not_rendered_again(self):
+        for url in (reverse("courses:course_list"), reverse("courses:course_detail", args=[self.course.pk])):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertIn("private", response["Cache-Control"])
+                self.assertTrue(response["ETag"].startswith('W/"'))
+                self.assertIn("Last-Modified", response)
+
+                # session, user with profile, validators; nothing is rendered
+                with self.assertNumQueries(3):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+                # the date does not cover the viewer's state, so it never validates alone
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+                self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate_the_etag(self):
+        detail = reverse("courses:course_detail", args=[self.course.pk])
+        set_favorite(self.student, self.course.pk, True)
+        self.assertEqual(self.revalidate(detail).status_code, 304)
+
+        other = get_user_model().objects.create_user("other@example.com", "Other", "pass-12345")
+        for change in (
+            lambda: set_favorite(self.student, self.course.pk, False),
+            lambda: set_favorite(other, self.course.pk, True),  # the favorite count
+            lambda: Course.objects.get(pk=self.course.pk).save(),
+        ):
+            etag = self.client.get(detail)["ETag"]
+            change()
+            response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+        courses = reverse("courses:course_list")
+        etag = self.client.get(courses)["ETag"]
+        Course.objects.create(title="Another", description="x")
+        self.assertEqual(self.client.get(courses, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        for change in (
+            lambda: set_favorite(self.student, self.course.pk, True),
+            lambda: Course.objects.filter(title="Another").delete(),
+        ):
+            first = self.client.get(courses)
+            change()
+            response = self.client.get(courses, HTTP_IF_NONE_MATCH=first["ETag"],
+                                       HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(courses, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200)
+
+    def test_pages_with_messages_are_not_validated(self):
+        admin = get_user_model().objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True)
+        self.client.force_login(admin)
+        self.client.post(reverse("courses:add_course"), {"title": "New", "description": "Fresh"})
+        response = self.client.get(reverse("courses:course_list"))
+        self.assertContains(response, "Course added successfully.")
+        self.assertNotIn("ETag", response)
+        self.assertIn("ETag", self.client.get(reverse("courses:course_list")))
+
+    async def test_async_views_answer_304(self):
+        with async_views():
+            client = AsyncClient()
+            await client.aforce_login(self.student)
+            url = reverse("courses:course_detail", args=[self.course.pk])
+            first = await client.get(url)
+            response = await client.get(url, headers={"If-None-Match": first["ETag"]})
+            self.assertEqual(response.status_code, 304)
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user("boss@example.com", "Boss", "pass-12345", is_admin=True, is_student=False)
+        self.students = [User.objects.create_user(f"cohort{i}@example.com", "Student", "pass-12345") for i in range(3)]
+        self.courses = [Course.objects.create(title=f"Term {i}", description="x") for i in range(2)]
+        Enrollment.objects.create(student=self.students[0], course=self.courses[0], grade="B")
+        refresh_stale_grade_stats()
+        self.url = reverse("courses:api_enrollments_bulk")
+
+    def post(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type="application/json")
+
+    def test_api_creates_missing_pairs_and_reports_the_rest(self):
+        self.client.force_login(self.admin)
+        response = self.post({"students": [s.pk for s in self.students] + [self.admin.pk, 9999],
+                              "courses": [c.pk for c in self.courses] + [8888]})
+        self.assertEqual(response.json(), {
+            "requested": 6, "created": 5, "skipped": 1,
+            "missing_students": sorted([self.admin.pk, 9999]), "missing_courses": [8888],
+        })
+        self.assertEqual(Enrollment.objects.count(), 6)
+        self.assertEqual(Enrollment.objects.get(student=self.students[0], course=self.courses[0]).grade, "B")
+        self.assertEqual(StatCounter.snapshot()[StatCounter.ENROLLMENTS], 6)
+        self.assertEqual(stale_course_ids(), [c.pk for c in self.courses])
+
+        self.assertEqual(self.post({"students": [self.students[1].pk], "courses": [self.courses[1].pk]}).json()["skipped"], 1)
+        self.assertEqual(self.post({"students": [], "courses": [1]}).status_code, 400)
+        with override_settings(BULK_ENROLL_MAX_PAIRS=5):
+            self.assertEqual(self.post({"students": [1, 2, 3], "courses": [1, 2]}).status_code, 400)
+
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.post({"students": [1], "courses": [1]}).status_code, 403)
+
+    def test_admin_action_enrolls_the_selection(self):
+        self.client.force_login(get_user_model().objects.create_superuser("root@example.com", "Root", "pass-12345"))
+        url = reverse("admin:accounts_user_changelist")
+        selection = {"action": "enroll_in_courses", "_selected_action": [s.pk for s in self.students[1:]]}
+        response = self.client.post(url, selection)
+        self.assertContains(response, "Enroll 2 selected students")
+
+        response = self.client.post(url, {**selection, "apply": "1", "courses": [c.pk for c in self.courses]})
+        self.assertRedirects(response, url)
+        self.assertEqual(Enrollment.objects.filter(student__in=self.students[1:]).count(), 4)
+        self.assertEqual(bulk_enroll([self.students[1].pk], [self.courses[0].pk])["created"], 0)
+
+        with override_settings(BULK_ENROLL_MAX_PAIRS=3):
+            response = self.client.post(url, {**selection, "apply": "1", "courses": [c.pk for c in self.courses]},
+                                        follow=True)
+        self.assertContains(response, "At most 3 student/course pairs per request.")
+
+    def test_batches_count_only_the_requested_pairs(self):
+        students = [s.pk for s in self.students]
+        with override_settings(BULK_ENROLL_BATCH_SIZE=2):
+            result = bulk_enroll(students, [c.pk for c in self.courses])
+        self.assertEqual(result, {"requested": 6, "created": 5, "skipped": 1})
+        self.assertEqual(Enrollment.objects.count(), 6)
+        with override_settings(BULK_ENROLL_MAX_PAIRS=5), self.assertRaises(CohortTooLarge):
+            bulk_enroll(students, [c.pk for c in self.courses])
+
+
+class GradeImportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.ann = User.objects.create_user("Ann@example.com", "Ann", "pass-12345")
+        self.bob = User.objects.create_user("bob@example.com", "Bob", "pass-12345")
+        self.math, self.art = (Course.objects.create(title=t, description="x") for t in ("Math", "Art"))
+        Enrollment.objects.create(student=self.ann, course=self.math, grade="B")
+        Enrollment.objects.create(student=self.ann, course=self.art, grade="C")
+        Enrollment.objects.create(student=self.bob, course=self.math, grade="A")
+        refresh_stale_grade_stats()
+        self.csv = (
+            "grade,course_id,student_email\n"
+            f"a-,{self.math.pk},ann@example.com\n"
+            f"B+,{self.art.pk},ann@example.com\n"
+            f"A,{self.math.pk},bob@example.com\n"
+            f"Q,{self.math.pk},bob@example.com\n"
+            f"A,{self.art.pk},bob@example.com\n"
+            f"A,{self.art.pk},nobody@example.com\n"
+            "A,art,bob@example.com\n"
+            "\n"
+            f",{self.art.pk},ANN@example.com\n"
+        )
+
+    def grades(self):
+        return set(Enrollment.objects.values_list("student__name", "course__title", "grade"))
+
+    def test_dry_run_reports_the_diff_without_saving(self):
+        before, changes = self.grades(), []
+        with self.assertNumQueries(4):  # savepoint, users, enrollments, release
+            result = import_grades(StringIO(self.csv), dry_run=True, on_change=lambda *change: changes.append(change))
+        self.assertEqual(self.grades(), before)
+        # a later row for the same enrollment wins; an empty grade clears it
+        self.assertEqual(changes, [("ann@example.com", self.math.pk, "B", "A-"),
+                                   ("ANN@example.com", self.art.pk, "C", None)])
+        self.assertEqual({k: result[k] for k in ("rows", "updated", "unchanged", "failed")},
+                         {"rows": 8, "updated": 2, "unchanged": 2, "failed": 4})
+        self.assertEqual(sorted(line for line, _ in result["errors"]), [5, 6, 7, 8])
+        self.assertEqual(stale_course_ids(), [])
+
+    def test_applies_grades_chunk_by_chunk(self):
+        with self.assertNumQueries(7):  # the above plus one UPDATE per grade and the stats flag
+            import_grades(StringIO(self.csv))
+        expected = {("Ann", "Math", "A-"), ("Ann", "Art", None), ("Bob", "Math", "A")}
+        self.assertEqual(self.grades(), expected)
+        self.assertEqual(stale_course_ids(), sorted([self.math.pk, self.art.pk]))
+
+        Enrollment.objects.filter(student=self.ann).update(grade="F")
+        result = import_grades(StringIO(self.csv), chunk_size=2)
+        self.assertEqual(self.grades(), expected)
+        self.assertEqual(result["failed"], 4)
+        with self.assertRaises(GradeFileError):
+            import_grades(StringIO("email,grade\nann@example.com,A\n"))
+
+    def test_command_and_admin_upload(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as fh:
+            fh.write(self.csv)
+        self.addCleanup(os.unlink, fh.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_grades", fh.name, dry_run=True, stdout=out, stderr=err)
+        self.assertEqual(out.getvalue().splitlines(), [
+            "student_email,course_id,old_grade,new_grade",
+            f"ann@example.com,{self.math.pk},B,A-",
+            f"ANN@example.com,{self.art.pk},C,",
+        ])
+        self.assertIn("line 5: unknown grade 'Q'", err.getvalue())
+        self.assertIn("8 rows: 2 grades would be updated", err.getvalue())
+        self.assertEqual(Enrollment.objects.get(student=self.ann, course=self.math).grade, "B")
+
+        self.client.force_login(get_user_model().objects.create_superuser("root@example.com", "Root", "pass-12345"))
+        url = reverse("admin:courses_enrollment_upload_grades")
+        self.assertContains(self.client.get(reverse("admin:courses_enrollment_changelist")), url)
+        upload = lambda data: SimpleUploadedFile("grades.csv", data.encode())
+        response = self.client.post(url, {"file": upload(self.csv), "dry_run": "on"})
+        self.assertContains(response, "Dry run: nothing was saved")
+        self.assertContains(response, "Line 7: no user with email")
+        self.assertEqual(Enrollment.objects.get(student=self.ann, course=self.math).grade, "B")
+
+        response = self.client.post(url, {"file": upload(f"student_email,course_id,grade\nbob@example.com,{self.math.pk},c\n")})
+        self.assertRedirects(response, reverse("admin:courses_enrollment_changelist"))
+        self.assertEqual(Enrollment.objects.get(student=self.bob, course=self.math).grade, "C")
+        self.assertContains(self.client.post(url, {"file": upload("no,columns\n")}), "The header has no")
@@ -1,20 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     ManageCoursesView, AddCourseView, EditCourseView, DeleteCourseView,
     CourseListView, CourseDetailView, ToggleFavoriteView, EnrollmentListView,
-    StudentEnrollmentsView,
+    StudentEnrollmentsView, CourseSearchView, FavoriteAPIView, FavoriteBatchAPIView,
+    EnrollmentExportView, CourseAnalyticsView, BulkEnrollmentAPIView,
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import CourseDetailView, CourseListView, StudentEnrollmentsView  # noqa: F811
+
 app_name = "courses"
 
 urlpatterns = [
     path("", CourseListView.as_view(), name="course_list"),
+    path("search/", CourseSearchView.as_view(), name="course_search"),
     path("manage/", ManageCoursesView.as_view(), name="manage_courses"),
     path("add/", AddCourseView.as_view(), name="add_course"),
     path("edit/<int:pk>/", EditCourseView.as_view(), name="edit_course"),
     path("delete/<int:pk>/", DeleteCourseView.as_view(), name="delete_course"),
     path("<int:pk>/", CourseDetailView.as_view(), name="course_detail"),
     path("<int:pk>/toggle_favorite/", ToggleFavoriteView.as_view(), name="toggle_favorite"),
+    path("api/favorites/batch/", FavoriteBatchAPIView.as_view(), name="api_favorites_batch"),
+    path("api/favorites/<int:pk>/", FavoriteAPIView.as_view(), name="api_favorite"),
     path("enrollments/", EnrollmentListView.as_view(), name="enrollments_list"),
+    path("enrollments/export/", EnrollmentExportView.as_view(), name="enrollments_export"),
+    path("api/enrollments/bulk/", BulkEnrollmentAPIView.as_view(), name="api_enrollments_bulk"),
     path("my-courses/", StudentEnrollmentsView.as_view(), name="my_courses"),
+    path("analytics/", CourseAnalyticsView.as_view(), name="course_analytics"),
 ]
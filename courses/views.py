@@ -1,14 +1,27 @@
 # courses/views.py
+import json
+
+from django.conf import settings
+from django.db import transaction
 from django.views import View
 from django.views.generic import ListView
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponseForbidden
+from django.http import (
+    HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .models import Course, Enrollment
-from .forms import CourseForm
-from accounts.models import StudentProfile
+from .analytics import LETTERS, refresh_shown_grade_stats
+from .enrollments import CohortTooLarge, bulk_enroll, check_cohort_size, split_cohort
+from .conditional import ConditionalGetMixin, course_list_validators, course_validators
+from .models import Course, CourseGradeStats, Enrollment, Favorite
+from .exports import FORMATS, export_rows, filter_enrollments, render_export
+from .forms import CourseForm, EnrollmentFilterForm
+from .favorites import get_favorite_ids, set_favorite, set_favorites
+from .pagination import KeysetPaginator
+from .recommendations import also_liked
+from .search import search_courses
 
 
 # ======================
@@ -20,12 +33,14 @@ class ManageCoursesView(LoginRequiredMixin, View):
     Admin-only view to list and manage all courses.
     """
     template_name = "courses/manage_courses.html"
+    paginate_by = 50
 
     def get(self, request):
         if not request.user.is_admin:
             return HttpResponseForbidden("Only admin can manage courses.")
-        courses = Course.objects.all().order_by("-created_at")
-        return render(request, self.template_name, {"courses": courses})
+        paginator = KeysetPaginator(Course.objects.only("id", "title", "created_at"), self.paginate_by)
+        page = paginator.get_page_or_first(request.GET.get("cursor"))
+        return render(request, self.template_name, {"courses": page, "page": page})
 
 
 class AddCourseView(LoginRequiredMixin, View):
@@ -101,88 +116,295 @@ class DeleteCourseView(LoginRequiredMixin, View):
 #   Course Browsing
 # ======================
 
-class CourseListView(LoginRequiredMixin, View):
+class CourseListView(LoginRequiredMixin, ConditionalGetMixin, View):
     """
     View for students/admins to list all available courses.
     Also includes favorites if the user is a student.
     """
     template_name = "courses/course_list.html"
+    paginate_by = 24
+
+    def get_validators(self, request):
+        return course_list_validators(request)
 
     def get(self, request):
-        qs = Course.objects.all().order_by("-created_at")
-        favorite_ids = []
-        if hasattr(request.user, "studentprofile"):
-            profile = request.user.studentprofile
-            favorite_ids = profile.favorite_courses.values_list("id", flat=True)
+        paginator = KeysetPaginator(Course.objects.all(), self.paginate_by)
+        page = paginator.get_page_or_first(request.GET.get("cursor"))
         return render(
             request,
             self.template_name,
-            {"courses": qs, "favorite_ids": set(favorite_ids)},
+            {"courses": page, "page": page, "favorite_ids": get_favorite_ids(request.user)},
         )
 
 
-class CourseDetailView(LoginRequiredMixin, View):
+class CourseDetailView(LoginRequiredMixin, ConditionalGetMixin, View):
     """
     View for displaying detailed information about a single course.
     """
     template_name = "courses/course_detail.html"
 
+    def get_validators(self, request, pk):
+        return course_validators(request, pk)
+
     def get(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        favorite_ids = set()
-        if hasattr(request.user, "studentprofile"):
-            favorite_ids = set(request.user.studentprofile.favorite_courses.values_list("id", flat=True))
-        return render(request, self.template_name, {"course": course, "favorite_ids": favorite_ids})
+        return render(request, self.template_name, {
+            "course": course,
+            "favorite_ids": get_favorite_ids(request.user),
+            # index-only count on (course, created_at, user)
+            "favorite_count": Favorite.objects.filter(course_id=pk).count(),
+            "also_liked": also_liked(pk),
+        })
+
+
+class CourseSearchView(LoginRequiredMixin, View):
+    """
+    Ranked full-text search over course titles and descriptions.
+    """
+    template_name = "courses/search.html"
+    paginate_by = 20
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        try:
+            page = int(request.GET.get("page", 1))
+        except ValueError:
+            page = 1
+        # nothing is ranked past the candidate window, and a huge page would
+        # overflow the OFFSET parameter
+        last_page = max(-(-settings.COURSE_SEARCH_MAX_CANDIDATES // self.paginate_by), 1)
+        page = min(max(page, 1), last_page)
+
+        results, has_next, windowed = search_courses(query, page, self.paginate_by) if query else ([], False, False)
+        return render(request, self.template_name, {
+            "query": query,
+            "courses": results,
+            "page_number": page,
+            "has_next": has_next,
+            "windowed": windowed,
+            "window": settings.COURSE_SEARCH_MAX_CANDIDATES,
+            "favorite_ids": get_favorite_ids(request.user),
+        })
 
 
 # ======================
-#   Favorites (supports GET + POST)
+#   Favorites
 # ======================
 
 class ToggleFavoriteView(LoginRequiredMixin, View):
     """
-    Toggle favorite status of a course for students only.
-    Supports both GET (link) and POST (form).
+    Toggle favorite status of a course for students only (POST form).
+    Pages with JavaScript use the JSON endpoints below instead.
     """
 
     def post(self, request, pk):
-        return self._toggle(request, pk)
-
-    def get(self, request, pk):
-        return self._toggle(request, pk)
-
-    def _toggle(self, request, pk):
         if not request.user.is_student:
             return HttpResponseForbidden("Only students can favorite courses.")
 
         course = get_object_or_404(Course, pk=pk)
-        profile, _ = StudentProfile.objects.get_or_create(user=request.user)
 
-        if profile.favorite_courses.filter(pk=course.pk).exists():
-            profile.favorite_courses.remove(course)
+        if set_favorite(request.user, course.pk, False):
             messages.info(request, f"Removed {course.title} from favorites.")
         else:
-            profile.favorite_courses.add(course)
+            set_favorite(request.user, course.pk, True)
             messages.success(request, f"Added {course.title} to favorites.")
 
         # Redirect to the previous page if available
         return redirect(request.META.get("HTTP_REFERER", "courses:course_list"))
 
 
+class JSONAPIMixin(LoginRequiredMixin):
+    """
+    JSON flavour of the login check, plus request body parsing.
+    """
+
+    def handle_no_permission(self):
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    def read_json(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+
+
+class FavoriteAPIMixin(JSONAPIMixin):
+    """
+    Students only, for the favorites API.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_student:
+            return JsonResponse({"error": "Only students can favorite courses."}, status=403)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class FavoriteAPIView(FavoriteAPIMixin, View):
+    """
+    POST {"favorite": true|false} to set the state of one course.
+    Idempotent: repeating a request reports changed=false.
+    """
+
+    def post(self, request, pk):
+        data = self.read_json(request)
+        if not isinstance(data, dict) or not isinstance(data.get("favorite"), bool):
+            return JsonResponse({"error": 'Expected {"favorite": true|false}.'}, status=400)
+        if not Course.objects.filter(pk=pk).exists():
+            return JsonResponse({"error": "Course not found."}, status=404)
+
+        changed = set_favorite(request.user, pk, data["favorite"])
+        return JsonResponse({"course": pk, "favorite": data["favorite"], "changed": changed})
+
+
+class FavoriteBatchAPIView(FavoriteAPIMixin, View):
+    """
+    POST {"operations": [{"course": id, "favorite": bool}, ...]} to apply
+    queued (e.g. offline) clicks in order, all in one transaction.
+    """
+    max_operations = 500
+
+    def post(self, request):
+        data = self.read_json(request)
+        operations = data.get("operations") if isinstance(data, dict) else None
+        if not isinstance(operations, list) or len(operations) > self.max_operations:
+            return JsonResponse(
+                {"error": f'Expected {{"operations": [...]}} with at most {self.max_operations} items.'},
+                status=400,
+            )
+
+        # later operations on the same course win
+        final = {}
+        for op in operations:
+            if not (isinstance(op, dict) and type(op.get("course")) is int
+                    and isinstance(op.get("favorite"), bool)):
+                return JsonResponse({"error": 'Each operation needs "course" (int) and "favorite" (bool).'}, status=400)
+            final.pop(op["course"], None)
+            final[op["course"]] = op["favorite"]
+
+        existing = set(Course.objects.filter(pk__in=final).values_list("id", flat=True))
+        with transaction.atomic():
+            changed = set_favorites(request.user, {c: f for c, f in final.items() if c in existing})
+        results = [
+            {"course": course_id, "favorite": final[course_id], "changed": was_changed}
+            for course_id, was_changed in changed.items()
+        ]
+
+        return JsonResponse({
+            "results": results,
+            "missing": [course_id for course_id in final if course_id not in existing],
+        })
+
+
 # ======================
 #   Enrollments
 # ======================
 
-class EnrollmentListView(LoginRequiredMixin, ListView):
+class BulkEnrollmentAPIView(JSONAPIMixin, View):
     """
-    Admin view: list all student enrollments.
+    Admin-only. POST {"students": [id, ...], "courses": [id, ...]} to enroll
+    every student in every course in one transaction. Existing enrollments
+    are skipped; unknown ids are reported and left out.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_admin:
+            return JsonResponse({"error": "Only admin can enroll students."}, status=403)
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request):
+        data = self.read_json(request)
+        ids = {key: data.get(key) if isinstance(data, dict) else None for key in ("students", "courses")}
+        if not all(isinstance(v, list) and v and all(type(i) is int for i in v) for v in ids.values()):
+            return JsonResponse({"error": 'Expected {"students": [id, ...], "courses": [id, ...]}.'}, status=400)
+        try:
+            # before the id lookups, which would otherwise run on the whole lists
+            check_cohort_size(ids["students"], ids["courses"])
+        except CohortTooLarge as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        (students, courses), (missing_students, missing_courses) = split_cohort(ids["students"], ids["courses"])
+        result = bulk_enroll(students, courses)
+        return JsonResponse({**result, "missing_students": missing_students, "missing_courses": missing_courses})
+
+
+class EnrollmentFilterMixin:
+    """Admin-only access plus the validated EnrollmentFilterForm filters."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_admin:
+            return HttpResponseForbidden("Only admin can view enrollments.")
+        return super().dispatch(request, *args, **kwargs)
+
+    def filtered_enrollments(self, form):
+        filters = form.cleaned_data if form.is_valid() else {}
+        return filter_enrollments(Enrollment.objects.all(), **filters)
+
+
+class EnrollmentListView(LoginRequiredMixin, EnrollmentFilterMixin, View):
+    """
+    Admin view: list all student enrollments, newest first, with filters.
     """
-    model = Enrollment
     template_name = "courses/enrollments_list.html"
-    context_object_name = "enrollments"
+    paginate_by = 50
 
-    def get_queryset(self):
-        return Enrollment.objects.all().select_related("student", "course")
+    def get(self, request):
+        form = EnrollmentFilterForm(request.GET)
+        enrollments = (
+            self.filtered_enrollments(form)
+            .select_related("student", "course")
+            .only("id", "enrolled_on", "grade", "student__email", "student__name", "course__title")
+        )
+        paginator = KeysetPaginator(enrollments, self.paginate_by, field="enrolled_on")
+        page = paginator.get_page_or_first(request.GET.get("cursor"))
+
+        filter_query = request.GET.copy()
+        filter_query.pop("cursor", None)
+        return render(request, self.template_name, {
+            "enrollments": page,
+            "page": page,
+            "form": form,
+            "filter_query": filter_query.urlencode(),
+        })
+
+
+class EnrollmentExportView(LoginRequiredMixin, EnrollmentFilterMixin, View):
+    """
+    Admin view: stream the filtered enrollments as CSV or JSON Lines.
+    """
+
+    def get(self, request):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest("format must be csv or jsonl.")
+        form = EnrollmentFilterForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+
+        rows = export_rows(self.filtered_enrollments(form))
+        response = StreamingHttpResponse(render_export(rows, fmt), content_type=FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="enrollments.{fmt}"'
+        return response
+
+
+class CourseAnalyticsView(LoginRequiredMixin, View):
+    """
+    Admin view: grade distribution, mean, quartiles and pass rate per course,
+    read from CourseGradeStats. Only the stale rows on the page being shown
+    are refreshed here; `manage.py refresh_grade_stats` covers the rest.
+    """
+    template_name = "courses/course_analytics.html"
+    paginate_by = 50
+
+    def get(self, request):
+        if not request.user.is_admin:
+            return HttpResponseForbidden("Only admin can view course analytics.")
+        courses = Course.objects.select_related("grade_stats").only(
+            "id", "title", "created_at", *(f"grade_stats__{f.name}" for f in CourseGradeStats._meta.concrete_fields)
+        )
+        paginator = KeysetPaginator(courses, self.paginate_by)
+        page = paginator.get_page_or_first(request.GET.get("cursor"))
+        refresh_shown_grade_stats(page.object_list)
+        return render(request, self.template_name, {"courses": page, "page": page, "letters": LETTERS})
 
 
 class StudentEnrollmentsView(LoginRequiredMixin, ListView):
@@ -198,3 +420,8 @@ class StudentEnrollmentsView(LoginRequiredMixin, ListView):
             Enrollment.objects.filter(student=self.request.user)
             .select_related("course")
         )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["favorite_ids"] = get_favorite_ids(self.request.user)
+        return context
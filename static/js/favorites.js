@@ -0,0 +1,60 @@
+// Favorite buttons: send clicks to the JSON API instead of reloading the page.
+// Clicks made while offline are queued in localStorage and replayed through
+// the batch endpoint once the browser is back online.
+(() => {
+  const batchUrl = document.currentScript && document.currentScript.dataset.batchUrl;
+  const QUEUE_KEY = "favorite-queue";
+
+  const csrfToken = (form) => form.querySelector("[name=csrfmiddlewaretoken]").value;
+
+  const render = (form, favorite) => {
+    const button = form.querySelector("button");
+    form.dataset.favorite = favorite ? "true" : "false";
+    button.textContent = favorite ? "Unfavorite" : "Favorite";
+    button.classList.toggle("btn-outline-danger", favorite);
+    button.classList.toggle(form.dataset.idleClass, !favorite);
+  };
+
+  const readQueue = () => JSON.parse(localStorage.getItem(QUEUE_KEY) || "[]");
+
+  const flushQueue = async (token) => {
+    const operations = readQueue();
+    if (!batchUrl || !operations.length || !navigator.onLine) return;
+    const response = await fetch(batchUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": token },
+      body: JSON.stringify({ operations }),
+    });
+    if (response.ok) localStorage.removeItem(QUEUE_KEY);
+  };
+
+  document.addEventListener("DOMContentLoaded", () => {
+    const forms = document.querySelectorAll("[data-favorite-form]");
+    if (!forms.length) return;
+    const token = csrfToken(forms[0]);
+
+    forms.forEach((form) => {
+      form.addEventListener("submit", async (event) => {
+        event.preventDefault();
+        const favorite = form.dataset.favorite !== "true";
+        render(form, favorite);
+
+        try {
+          const response = await fetch(form.dataset.apiUrl, {
+            method: "POST",
+            headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken(form) },
+            body: JSON.stringify({ favorite }),
+          });
+          if (!response.ok) render(form, !favorite);
+        } catch (err) {
+          // offline: remember the click and replay it later
+          const course = parseInt(form.dataset.apiUrl.match(/(\d+)\/?$/)[1], 10);
+          localStorage.setItem(QUEUE_KEY, JSON.stringify([...readQueue(), { course, favorite }]));
+        }
+      });
+    });
+
+    window.addEventListener("online", () => flushQueue(token));
+    flushQueue(token);
+  });
+})();